@@ -5,21 +5,126 @@ All runs are persisted to PostgreSQL. Until auth is implemented, all
 operations use the ANONYMOUS_USER_ID.
 """
 
+import hashlib
+import hmac
 import os
+import uuid
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime
 
+import anyio
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
 from app.models.dto import ExpandRequest, ExportRequest, IdeasRequest
 
 load_dotenv()
 
-from app.graph import app as graph_app, expand_idea as graph_expand_idea
+from app.graph import expand_batch_stats, expand_idea as graph_expand_idea, hedging_stats, parse_stats
+from app.services import (
+    bulk_export,
+    cassette,
+    clients,
+    jobs,
+    limiter,
+    llm_cache,
+    pipeline_timing,
+    pre_expand,
+    profiling,
+    request_trace,
+    run_cache,
+    write_behind,
+)
+from app.services.db import pool_stats
 from app.services.export_formatter import idea_to_markdown
-from app.services.run_service import get_run, load_history, save_expanded_idea, save_run
+from app.services.idea_service import IdeaCountMismatch, generate_run
+from app.services.job_service import create_job, get_job, mark_failed
+from app.services.run_service import (
+    get_latest_expansion,
+    get_run,
+    get_run_async,
+    iter_runs_for_analytics,
+    iter_runs_for_export,
+    load_history_async,
+    save_expanded_idea,
+)
+
+
+# Worker threads for sync endpoints (AnyIO's default limiter); 0 keeps its default of 40.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "0"))
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if THREADPOOL_SIZE > 0:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    jobs.pool.start()
+    yield
+    jobs.pool.stop()
+    pre_expand.shutdown()
+    # Graceful shutdown: commit anything still queued for write-behind.
+    write_behind.shutdown()
+    clients.close_all()
+
+
+api = FastAPI(title="Dev-Strom", lifespan=lifespan)
+# Compress anything over ~1 KB (run details with web_context, history pages).
+api.add_middleware(GZipMiddleware, minimum_size=1000)
+if request_trace.REQUEST_TRACE_PATH:
+    # Record the live request mix for scripts/load_test.py --trace.
+    api.add_middleware(request_trace.RequestTraceMiddleware, path=request_trace.REQUEST_TRACE_PATH)
+if profiling.PROFILE_SAMPLE_RATE > 0:
+    # Sampled stack profiles, listed under /admin/profiles.
+    api.add_middleware(profiling.ProfilingMiddleware)
+
+
+@api.exception_handler(limiter.AdmissionTimeout)
+async def _admission_timeout(_request: Request, exc: limiter.AdmissionTimeout):
+    """Upstream provider is saturated: shed load with 503 + Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# ── JSON responses ────────────────────────────────────────────────────────────
+
+def _json(payload: dict) -> Response:
+    """Serialize with orjson, skipping FastAPI's jsonable_encoder + json.dumps pass."""
+    return Response(orjson.dumps(payload), media_type="application/json")
+
+
+# ── Conditional GET helpers ───────────────────────────────────────────────────
+
+# Top-level keys a client may select with ?fields= on GET /runs/{run_id}.
+RUN_FIELDS = frozenset({
+    "run_id", "user_id", "tech_stack", "domain", "level", "count",
+    "enable_multi_query", "ideas", "web_context", "created_at",
+})
+
 
-api = FastAPI(title="Dev-Strom")
+def _conditional_json(request: Request, payload: dict) -> Response:
+    """Serialize payload once, tag it with a weak ETag, and honour If-None-Match.
+
+    The tag is weak because GZipMiddleware may send the same JSON gzipped or
+    as identity, and a strong tag would have to differ per encoding. Returns
+    304 with an empty body when the client already holds this content, so
+    repeat loads from Streamlit reruns cost a header round-trip.
+    """
+    body = orjson.dumps(payload)
+    opaque = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": f"W/{opaque}", "Cache-Control": "no-cache"}  # always revalidate
+
+    # Weak comparison (RFC 9110 §8.8.3.2): ignore W/ on both sides.
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if opaque in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
 # ── Idea Generation ───────────────────────────────────────────────────────────
@@ -33,43 +138,58 @@ def post_ideas(body: IdeasRequest):
             detail="Set OPENAI_API_KEY and TAVILY_API_KEY in .env",
         )
 
-    inputs = {"tech_stack": body.tech_stack, "count": body.count}
-    if body.domain and body.domain.strip():
-        inputs["domain"] = body.domain.strip()
-    if body.level and body.level.strip():
-        inputs["level"] = body.level.strip()
-    if body.enable_multi_query:
-        inputs["enable_multi_query"] = True
-
-    result = graph_app.invoke(inputs)
-    ideas = result.get("ideas", [])
-    if len(ideas) != body.count:
+    try:
+        return _json(generate_run(body))
+    except IdeaCountMismatch as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+# ── Jobs ───────────────────────────────────────────────────────────────────────
+
+@api.post("/jobs/ideas", status_code=202)
+def post_ideas_job(body: IdeasRequest):
+    """Queue an idea-generation job and return its job_id immediately.
+
+    Poll GET /jobs/{job_id} until status is "succeeded" or "failed".
+    """
+    if not os.getenv("OPENAI_API_KEY") or not os.getenv("TAVILY_API_KEY"):
         raise HTTPException(
-            status_code=500,
-            detail=f"Expected {body.count} ideas from graph, got {len(ideas)}",
+            status_code=503,
+            detail="Set OPENAI_API_KEY and TAVILY_API_KEY in .env",
         )
 
-    # Attach 1-based position IDs
-    out = []
-    for i, idea in enumerate(ideas, 1):
-        d = idea if isinstance(idea, dict) else (
-            idea.model_dump() if hasattr(idea, "model_dump") else {}
+    job_id = create_job(kind=jobs.IDEAS_JOB, request=body.model_dump())
+    try:
+        jobs.pool.submit(job_id)
+    except jobs.QueueFull as exc:
+        # Fail the row so startup recovery does not run it behind the client's back.
+        mark_failed(job_id=job_id, error=str(exc))
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status": "queued"}
+
+
+@api.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """Return a job's status, the last graph node reached and, once done, its result."""
+    job = get_job(job_id=job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found.",
         )
-        d["pid"] = i
-        out.append(d)
-
-    # Persist run to database
-    run_id = save_run(
-        tech_stack=body.tech_stack,
-        domain=inputs.get("domain"),
-        level=inputs.get("level"),
-        count=body.count,
-        enable_multi_query=body.enable_multi_query,
-        ideas=out,
-        web_context=result.get("web_context"),
-    )
-
-    return {"ideas": out, "run_id": run_id}
+    out = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "progress": {"node": job["progress"]},
+        "run_id": job["run_id"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+    if job["status"] == "succeeded" and job["run_id"]:
+        run = get_run(run_id=job["run_id"])
+        out["result"] = {"ideas": run["ideas"], "run_id": job["run_id"]} if run else None
+    return out
 
 
 # ── Idea Expansion ────────────────────────────────────────────────────────────
@@ -100,7 +220,25 @@ def post_expand(body: ExpandRequest):
 
     idea = ideas[body.pid - 1].copy()
     idea.pop("pid", None)
-    result = graph_expand_idea(idea)
+
+    # With pre-expansion on, serve the speculative (stored) expansion unless the
+    # caller asks for a fresh one; with it off, /expand always regenerates.
+    if pre_expand.PRE_EXPAND_ENABLED and not body.fresh:
+        # A speculative expansion already running: wait for it rather than pay
+        # twice, but only so long; on timeout or failure expand normally.
+        if (task := pre_expand.claim(body.run_id, body.pid)) is not None:
+            try:
+                task.result(timeout=pre_expand.PRE_EXPAND_CLAIM_WAIT_S)
+            except Exception:
+                pass
+        stored = get_latest_expansion(run_id=body.run_id, pid=body.pid)
+        if stored is not None:
+            pre_expand.note_served(body.run_id, body.pid)
+            return _json({"idea": idea, "extended_plan": stored})
+
+    # fresh: skip the stored expansion *and* cached LLM responses.
+    with llm_cache.bypass() if body.fresh else nullcontext():
+        result = graph_expand_idea(idea)
 
     # Persist expanded idea to database
     save_expanded_idea(
@@ -109,7 +247,7 @@ def post_expand(body: ExpandRequest):
         extended_plan=result.get("extended_plan", []),
     )
 
-    return result
+    return _json(result)
 
 
 # ── Export ─────────────────────────────────────────────────────────────────────
@@ -131,14 +269,15 @@ def post_export(body: ExportRequest):
             detail=f"Invalid pid. Use pid 1–{len(ideas)} for this run.",
         )
 
-    # For export, we need to re-expand (or the caller can expand first).
-    # Try to get the idea and its expansion from the graph.
     idea = ideas[body.pid - 1].copy()
     idea.pop("pid", None)
 
-    # Re-expand the idea for export (consistent with original behavior)
-    expanded = graph_expand_idea(idea)
-    extended_plan = expanded.get("extended_plan", [])
+    # Use the stored expansion (user- or pre-expanded); re-expand only if none exists.
+    extended_plan = get_latest_expansion(run_id=body.run_id, pid=body.pid)
+    if extended_plan is None:
+        extended_plan = graph_expand_idea(idea).get("extended_plan", [])
+    else:
+        pre_expand.note_served(body.run_id, body.pid)
 
     md = idea_to_markdown(idea, extended_plan, run.get("tech_stack"))
     name_slug = (idea.get("name") or "idea").replace(" ", "_")[:50]
@@ -151,25 +290,204 @@ def post_export(body: ExportRequest):
     )
 
 
+def _export_format(fmt: str) -> str:
+    if fmt not in bulk_export.FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format {fmt!r}. Use one of: {', '.join(bulk_export.FORMATS)}.",
+        )
+    return fmt
+
+
+def _streaming_export(files, fmt: str, basename: str) -> StreamingResponse:
+    return StreamingResponse(
+        bulk_export.stream(files, fmt),
+        media_type=bulk_export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{basename}.{fmt}"'},
+    )
+
+
+@api.get("/runs/{run_id}/export")
+def export_run(
+    run_id: str,
+    format: str = Query(default="zip", description="'zip' (one .md per idea) or 'md' (one document)"),
+):
+    """Export every idea of a run, with stored expansions, as a streamed download."""
+    fmt = _export_format(format)
+    if get_run(run_id=run_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Run {run_id} not found.",
+        )
+    files = bulk_export.iter_run_files(iter_runs_for_export(run_ids=[run_id]), per_run_dirs=False)
+    return _streaming_export(files, fmt, f"devstrom_run_{run_id[:8]}")
+
+
+@api.get("/export/history")
+def export_history(
+    format: str = Query(default="zip", description="'zip' (a folder per run) or 'md' (one document)"),
+    limit: int = Query(default=1000, ge=1, le=10000, description="Max runs to export, most recent first"),
+    offset: int = Query(default=0, ge=0, description="Pagination offset"),
+):
+    """Export many past runs as a streamed download, in constant memory.
+
+    Uses stored expansions only; never calls the LLM.
+    """
+    fmt = _export_format(format)
+    files = bulk_export.iter_run_files(iter_runs_for_export(limit=limit, offset=offset), per_run_dirs=True)
+    return _streaming_export(files, fmt, "devstrom_history")
+
+
 # ── History ────────────────────────────────────────────────────────────────────
 
 @api.get("/history")
-def get_history(
+async def get_history(
+    request: Request,
     limit: int = Query(default=20, ge=1, le=100, description="Max runs to return"),
     offset: int = Query(default=0, ge=0, description="Pagination offset"),
 ):
     """Return the user's past runs, most recent first."""
-    runs = load_history(limit=limit, offset=offset)
-    return {"runs": runs, "limit": limit, "offset": offset}
+    runs = await load_history_async(limit=limit, offset=offset)
+    return _conditional_json(request, {"runs": runs, "limit": limit, "offset": offset})
 
 
 @api.get("/runs/{run_id}")
-def get_run_detail(run_id: str):
+async def get_run_detail(
+    request: Request,
+    run_id: str,
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated top-level fields to return (e.g. 'tech_stack,ideas'). "
+                    "Defaults to all fields.",
+    ),
+):
     """Return full details of a single run including all ideas."""
-    run = get_run(run_id=run_id)
+    selected = None
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected - RUN_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                       f"Allowed: {', '.join(sorted(RUN_FIELDS))}.",
+            )
+        selected.add("run_id")
+
+    run = await get_run_async(run_id=run_id)
     if run is None:
         raise HTTPException(
             status_code=404,
             detail=f"Run {run_id} not found.",
         )
-    return run
+    if selected is not None:
+        run = {k: v for k, v in run.items() if k in selected}
+    return _conditional_json(request, run)
+
+
+# ── Admin ──────────────────────────────────────────────────────────────────────
+# Every /admin route needs an X-Admin-Token header matching ADMIN_TOKEN; with
+# ADMIN_TOKEN unset they answer 404, as if not mounted.
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def _require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token.")
+
+
+admin = APIRouter(prefix="/admin", dependencies=[Depends(_require_admin)])
+
+
+def _threadpool_stats() -> dict:
+    """Occupancy of the worker pool running sync endpoints (busy includes the metrics call)."""
+    lim = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "size": int(lim.total_tokens),
+        "busy": lim.borrowed_tokens,
+        "waiting": lim.statistics().tasks_waiting,
+    }
+
+
+@admin.get("/metrics")
+def get_metrics():
+    """Return in-process operational metrics (queues, caches, limiters)."""
+    return {
+        "write_behind": write_behind.stats(),
+        "run_cache": run_cache.stats(),
+        "jobs": jobs.pool.stats(),
+        "limiters": limiter.stats(),
+        "hedging": hedging_stats(),
+        "llm_cache": llm_cache.stats(),
+        "parsing": parse_stats(),
+        "graph_timing": pipeline_timing.stats(),
+        "pre_expand": pre_expand.stats(),
+        "expand_batching": expand_batch_stats(),
+        "clients": clients.stats(),
+        "cassette": cassette.stats(),
+        "profiling": profiling.stats(),
+        "threadpool": anyio.from_thread.run_sync(_threadpool_stats),
+        "db_pool": pool_stats(),
+    }
+
+
+@admin.get("/runs/export.jsonl")
+def export_runs_jsonl(
+    since: datetime | None = Query(default=None, description="Runs created at or after (ISO 8601)"),
+    until: datetime | None = Query(default=None, description="Runs created before (ISO 8601)"),
+    tech_stack: str | None = Query(default=None, description="Case-insensitive substring of tech_stack"),
+    user_id: uuid.UUID | None = Query(default=None, description="Only this user's runs (default: all)"),
+    include_web_context: bool = Query(default=False),
+):
+    """Stream runs with their expanded ideas as JSON Lines, oldest first, for warehouse loads.
+
+    Covers every user's runs unless user_id is given.
+
+    One line per run; expansions are nested under "expanded_ideas". Read
+    with a server-side cursor, so memory stays flat whatever the table size.
+    """
+    rows = iter_runs_for_analytics(
+        since=since,
+        until=until,
+        tech_stack=tech_stack,
+        user_id=user_id,
+        include_web_context=include_web_context,
+    )
+    return StreamingResponse(bulk_export.stream_jsonl(rows), media_type="application/x-ndjson")
+
+
+@admin.get("/profiles")
+def list_profiles():
+    """Stored request profiles, newest first (see PROFILE_SAMPLE_RATE)."""
+    return {"profiles": profiling.list_profiles(), **profiling.stats()}
+
+
+@admin.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: int,
+    format: str = Query(default="collapsed", description="'collapsed' (flame-graph input) or 'summary' (JSON)"),
+):
+    """Download one profile as collapsed stacks, or a summary of the hottest frames."""
+    prof = profiling.get(profile_id)
+    if prof is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile {profile_id} not found.",
+        )
+    if format == "summary":
+        return prof.summary()
+    if format != "collapsed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format {format!r}. Use 'collapsed' or 'summary'.",
+        )
+    return PlainTextResponse(
+        prof.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile_{profile_id}.collapsed"'},
+    )
+
+
+api.include_router(admin)
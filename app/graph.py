@@ -1,19 +1,66 @@
 import json
+import os
 import re
+import contextvars
+import hashlib
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from functools import lru_cache
 from typing import TypedDict
 
+import orjson
 from deepagents import create_deep_agent
 from langchain.agents.middleware import wrap_model_call
+from langchain.agents.structured_output import ProviderStrategy
+from langchain.chat_models import init_chat_model
+from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
-from app.models.domain import ProjectIdea
-from app.tools import web_search_project_ideas
+from app.models.domain import ExpansionBatch, ExpansionPlan, IdeaList, ProjectIdea
+from app.services import cassette, clients, hedging, llm_cache
+from app.services.batching import MicroBatcher
+from app.services.limiter import limiter
+from app.services.pipeline_timing import RunTiming
+from app.tools import merge_snippets, start_multi_search, web_search_project_ideas
 
 
 # ── Model constant ────────────────────────────────────────────────────────
 MODEL = "gpt-5-mini"
 
+# "deep" sends each call through a deep agent; "lean" calls the chat model
+# directly with the same system prompt (no tool schemas, no agent loop).
+LLM_ENGINE = os.getenv("LLM_ENGINE", "deep").lower()
+
+# Ask the provider for JSON-schema constrained output (IdeaList / ExpansionPlan).
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Follow-up calls allowed to fill in ideas that were missing or invalid.
+IDEA_REPAIR_ATTEMPTS = int(os.getenv("IDEA_REPAIR_ATTEMPTS", "1"))
+
+# "batch" asks for all N ideas in one completion; "parallel" generates each
+# idea in its own concurrent call, seeded with a distinct angle.
+IDEA_GENERATION_MODE = os.getenv("IDEA_GENERATION_MODE", "batch").lower()
+IDEA_SIMILARITY_MAX = float(os.getenv("IDEA_SIMILARITY_MAX", "0.5"))  # Jaccard; above = duplicate
+_idea_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IDEA_PARALLEL_THREADS", "10")), thread_name_prefix="idea",
+)
+
+# Pipelined multi-query search: start generating once the primary query and
+# PIPELINE_MIN_RESULTS - 1 others have returned. Further results are folded
+# in only if they arrive within PIPELINE_DEADLINE_S of the search start.
+PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "false").lower() == "true"
+PIPELINE_MIN_RESULTS = int(os.getenv("PIPELINE_MIN_RESULTS", "2"))
+PIPELINE_DEADLINE_S = float(os.getenv("PIPELINE_DEADLINE_S", "1.0"))
+
+# Micro-batching of concurrent expand_idea calls into one multi-idea prompt.
+EXPAND_BATCH_ENABLED = os.getenv("EXPAND_BATCH_ENABLED", "false").lower() == "true"
+EXPAND_BATCH_WINDOW_S = float(os.getenv("EXPAND_BATCH_WINDOW_MS", "25")) / 1000
+EXPAND_BATCH_MAX = int(os.getenv("EXPAND_BATCH_MAX", "8"))
+
 # ── state ─────────────────────────────────────────────────────────────────────
 
 class DevStromStateRequired(TypedDict):
@@ -27,6 +74,8 @@ class DevStromStateOptional(TypedDict, total=False):
     level: str
     enable_multi_query: bool
     count: int
+    fresh: bool  # bypass the LLM response cache
+    timing: RunTiming  # phase timestamps, set by fetch_web_context
 
 
 class DevStromState(DevStromStateRequired, DevStromStateOptional):
@@ -49,17 +98,170 @@ def _strip_markdown_fences(text: str) -> str:
     return text.strip()
 
 
+_DECODER = json.JSONDecoder()
+
+
+def _extract_json(text: str) -> dict | None:
+    """Return the first JSON object in *text*, tolerating fences and surrounding prose."""
+    text = _strip_markdown_fences(text)
+    try:
+        data = orjson.loads(text)
+        return data if isinstance(data, dict) else None
+    except ValueError:
+        pass
+    start = text.find("{")
+    while start != -1:
+        try:
+            data, _ = _DECODER.raw_decode(text, start)
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
 def _extract_last_content(result: dict) -> str:
-    """Pull the string content from the last message in an agent result."""
+    """Pull the text content from the last message in an agent result."""
     messages = result.get("messages", [])
     if not messages:
         return ""
     last = messages[-1]
-    return last.content if hasattr(last, "content") else str(last)
+    return last.text if hasattr(last, "text") else str(last)
+
+
+# Replies that were not valid JSON for their schema and needed the tolerant
+# fallback. With structured output this should stay near zero.
+_parse_lock = threading.Lock()
+_parse_replies: Counter[str] = Counter()
+_parse_failures: Counter[str] = Counter()
+
+
+def _count_reply(kind: str, ok: bool) -> None:
+    with _parse_lock:
+        _parse_replies[kind] += 1
+        if not ok:
+            _parse_failures[kind] += 1
+
+
+def _load_reply(kind: str, raw: str) -> dict | None:
+    """Decode a text reply; falls back to _extract_json (and counts a failure)."""
+    data = None
+    try:
+        data = orjson.loads(raw)  # JSONDecodeError is a ValueError
+    except ValueError:
+        pass
+    ok = isinstance(data, dict)
+    _count_reply(kind, ok)
+    return data if ok else _extract_json(raw)
+
+
+def _structured(kind: str, reply: BaseModel | str, schema: type[BaseModel]) -> BaseModel | None:
+    """The agent's parsed structured response, if it has one (counted as a clean reply)."""
+    if isinstance(reply, schema):
+        _count_reply(kind, True)
+        return reply
+    return None
+
+
+def parse_stats() -> dict:
+    """Per-agent reply/parse-failure counts, for /admin/metrics."""
+    with _parse_lock:
+        return {
+            kind: {
+                "replies": _parse_replies[kind],
+                "failures": _parse_failures[kind],
+                "failure_rate": round(_parse_failures[kind] / _parse_replies[kind], 4),
+            }
+            for kind in _parse_replies
+        }
+
+
+def _openai_saturated() -> bool:
+    """True while calls are queued at the OpenAI limiter: a hedge would only lengthen the queue."""
+    return limiter("openai").queue_depth() > 0
+
+
+# One hedger per agent: idea and expand calls have very different latencies.
+_HEDGERS = {
+    kind: hedging.Hedger(kind, saturated=_openai_saturated)
+    for kind in ("ideas", "expand", "expand_batch")
+}
+
+
+def _get_agent(kind: str):
+    if kind == "ideas":
+        return _get_idea_agent()
+    if kind == "expand":
+        return _get_expand_agent()
+    return _get_expand_batch_agent()
+
+
+def _invoke_agent(kind: str, user_content: str) -> BaseModel | str:
+    """Send one user message to the "ideas", "expand" or "expand_batch" agent.
+
+    Returns the agent's structured_response (an instance of the kind's
+    schema) when it has one, otherwise the reply text to decode: with
+    LLM_STRUCTURED_OUTPUT=false, for the lean engine, or if the provider
+    did not return a parsed response. Each attempt runs under the OpenAI limiter, through the agent or — with
+    LLM_ENGINE=lean — straight to the chat model. With HEDGE_ENABLED, a slow
+    attempt is hedged with an identical backup call (see services/hedging.py);
+    only model calls that miss the LLM cache feed its latency window.
+    """
+    def attempt() -> BaseModel | str:
+        with limiter("openai").acquire():
+            if LLM_ENGINE == "lean":
+                return _invoke_model(kind, user_content)
+            result = _get_agent(kind).invoke({
+                "messages": [{"role": "user", "content": user_content}],
+            })
+        if (structured := result.get("structured_response")) is not None:
+            return structured
+        return _extract_last_content(result)
+
+    if hedging.HEDGE_ENABLED:
+        return _HEDGERS[kind].call(attempt)
+    return attempt()
+
+
+def _invoke_model(kind: str, user_content: str) -> str:
+    """Lean engine: one chat-model call with the agent's system prompt, cached like the agents."""
+    system = _SYSTEM_PROMPTS[kind]
+    schema = _SCHEMAS[kind] if LLM_STRUCTURED_OUTPUT else None
+    messages = [SystemMessage(system), HumanMessage(user_content)]
+    key = llm_cache.make_key(
+        str(MODEL), system, messages[1:], response_format=schema.__name__ if schema else "",
+    )
+
+    def call():
+        with _get_chat_model() as model:
+            if schema:
+                model = model.bind(response_format=schema)
+            start = time.monotonic()
+            try:
+                return cassette.model_call(key, messages[1:], lambda: [model.invoke(messages)])
+            finally:
+                hedging.observe(time.monotonic() - start)
+
+    reply = llm_cache.cached_call(key, call)
+    return _extract_last_content({"messages": reply})
+
+
+def hedging_stats() -> dict:
+    """Per-agent hedging metrics, for /admin/metrics."""
+    return {kind: h.stats() for kind, h in _HEDGERS.items()}
 
 
 # ── agent singletons (created once, reused) ───────────────────────────────────
 
+_SCHEMAS = {"ideas": IdeaList, "expand": ExpansionPlan, "expand_batch": ExpansionBatch}
+
+
+def _response_format(kind: str) -> ProviderStrategy | None:
+    """Provider-side JSON-schema output: the reply text is the JSON document itself."""
+    return ProviderStrategy(_SCHEMAS[kind]) if LLM_STRUCTURED_OUTPUT else None
+
+
 @wrap_model_call
 def _log_model_call(request, handler):
     print("[DevStrom middleware] model call (generate_ideas agent)")
@@ -68,6 +270,16 @@ def _log_model_call(request, handler):
     return handler(request)
 
 
+@wrap_model_call
+def _observe_model_call(request, handler):
+    """Report model-call latency to the hedger (below the LLM cache, so hits are not timed)."""
+    start = time.monotonic()
+    try:
+        return handler(request)
+    finally:
+        hedging.observe(time.monotonic() - start)
+
+
 @lru_cache(maxsize=None)
 def _get_idea_agent():
     return create_deep_agent(
@@ -75,7 +287,10 @@ def _get_idea_agent():
         model=MODEL,
         tools=[],
         system_prompt=_IDEAS_SYSTEM,
-        middleware=[_log_model_call],
+        middleware=[
+            _log_model_call, llm_cache.cache_model_call, _observe_model_call, cassette.cassette_model_call,
+        ],
+        response_format=_response_format("ideas"),
     )
 
 
@@ -86,9 +301,35 @@ def _get_expand_agent():
         model=MODEL,
         tools=[],
         system_prompt=_EXPAND_SYSTEM,
+        middleware=[llm_cache.cache_model_call, _observe_model_call, cassette.cassette_model_call],
+        response_format=_response_format("expand"),
     )
 
 
+@lru_cache(maxsize=None)
+def _get_expand_batch_agent():
+    return create_deep_agent(
+        name="expand_ideas_batch",
+        model=MODEL,
+        tools=[],
+        system_prompt=_EXPAND_BATCH_SYSTEM,
+        middleware=[llm_cache.cache_model_call, _observe_model_call, cassette.cassette_model_call],
+        response_format=_response_format("expand_batch"),
+    )
+
+
+clients.register("openai", lambda api_key: init_chat_model(MODEL, api_key=api_key or None))
+
+
+def _get_chat_model():
+    """Lease the lean-engine chat model, shared per OpenAI key through the client registry.
+
+    The deep agents build their own model from MODEL once per agent singleton
+    and keep it for the life of the process, so they do not use the registry.
+    """
+    return clients.lease("openai", os.getenv("OPENAI_API_KEY", ""))
+
+
 # ── system prompts ────────────────────────────────────────────────────────────
 
 _IDEAS_SYSTEM = """\
@@ -159,6 +400,20 @@ Rules:
 - Use this exact shape: {"extended_plan": ["Step 1: ...", "Step 2: ...", "Step 3: ...", "Step 4: ...", "Step 5: ..."]}
 """
 
+_EXPAND_BATCH_SYSTEM = """\
+You are an implementation advisor. You are given several project ideas, each under a key \
+(name, problem_statement, implementation_plan). Expand EACH idea independently into exactly 5 concise, \
+actionable next steps a developer can follow.
+
+Rules:
+- Output valid JSON only, no markdown fences or extra text.
+- Return one entry per input key, using the key exactly as given. Do not mix content between ideas.
+- Each step must be ONE sentence (max 30 words). Be specific and technical.
+- Use this exact shape: {"results": [{"key": "<key>", "extended_plan": ["Step 1: ...", "Step 2: ...", "Step 3: ...", "Step 4: ...", "Step 5: ..."]}]}
+"""
+
+_SYSTEM_PROMPTS = {"ideas": _IDEAS_SYSTEM, "expand": _EXPAND_SYSTEM, "expand_batch": _EXPAND_BATCH_SYSTEM}
+
 _EMPTY_IDEA: dict = {
     "name": "",
     "problem_statement": "",
@@ -170,73 +425,281 @@ _EMPTY_IDEA: dict = {
 
 # ── graph nodes ───────────────────────────────────────────────────────────────
 
-def fetch_web_context(state: DevStromState) -> dict:
-    result = web_search_project_ideas.invoke({
-        "tech_stack": state["tech_stack"],
-        "enable_multi_query": state.get("enable_multi_query", False),
-        "domain": state.get("domain"),
-    })
-    return {"web_context": result or ""}
+def _fetch_pipelined(state: DevStromState, timing: RunTiming) -> str:
+    """Multi-query search that returns as soon as enough context has arrived.
+
+    Stragglers keep running in the background (or are cancelled if not yet
+    started); their results are dropped. timing's search_finished mark is
+    set when the last one completes.
+    """
+    futures = start_multi_search(state["tech_stack"], state.get("domain"))
+    deadline = time.monotonic() + PIPELINE_DEADLINE_S
+    primary, others = futures[0], futures[1:]
+
+    wait([primary])
+    pending = set(others)
+    while pending and sum(f.done() for f in others) < PIPELINE_MIN_RESULTS - 1:
+        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+    if pending:
+        _, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+    snippets = [f.result() for f in futures if f.done()]
+    timing.mark("context_ready")
+
+    if not pending:
+        timing.mark("search_finished")
+    else:
+        left = len(pending)
+        lock = threading.Lock()
+
+        def on_done(_):
+            nonlocal left
+            with lock:
+                left -= 1
+                last = left == 0
+            if last:
+                timing.mark("search_finished")
+
+        for f in pending:
+            f.cancel()
+            f.add_done_callback(on_done)
+    return merge_snippets(snippets)
 
 
-def _parse_ideas(raw: str, expected_count: int) -> list[dict]:
-    """Parse and validate the LLM JSON response into a list of idea dicts."""
-    raw = _strip_markdown_fences(raw)
-    try:
-        data = json.loads(raw)
-        ideas = data.get("ideas", [])
-        validated = [ProjectIdea.model_validate(i).model_dump() for i in ideas]
-        return validated  # may be shorter/longer than expected_count; caller decides
-    except Exception:
+def fetch_web_context(state: DevStromState) -> dict:
+    pipelined = PIPELINE_ENABLED and state.get("enable_multi_query", False)
+    timing = RunTiming(pipelined=pipelined)
+    timing.mark("search_started")
+    if pipelined:
+        result = _fetch_pipelined(state, timing)
+    else:
+        result = web_search_project_ideas.invoke({
+            "tech_stack": state["tech_stack"],
+            "enable_multi_query": state.get("enable_multi_query", False),
+            "domain": state.get("domain"),
+        })
+        timing.mark("context_ready")
+        timing.mark("search_finished")
+    return {"web_context": result or "", "timing": timing}
+
+
+_IDEAS_ADAPTER = TypeAdapter(list[ProjectIdea])
+
+
+def _validate_ideas(items: list) -> list[dict]:
+    return _IDEAS_ADAPTER.dump_python(_IDEAS_ADAPTER.validate_python(items))
+
+
+def _parse_ideas(reply: IdeaList | str) -> list[dict]:
+    """Return every valid idea in the agent's reply.
+
+    A structured response is already validated and used as is. A text
+    reply is validated in one pass; if some ideas are invalid they are
+    dropped individually (by error location) rather than failing the whole
+    response. The result may be shorter or longer than requested and the
+    caller decides how to fill the gap.
+    """
+    if (structured := _structured("ideas", reply, IdeaList)) is not None:
+        return [idea.model_dump() for idea in structured.ideas]
+    data = _load_reply("ideas", reply)
+    ideas = data.get("ideas") if data else None
+    if not isinstance(ideas, list):
         return []
+    try:
+        return _validate_ideas(ideas)
+    except ValidationError as exc:
+        bad = {err["loc"][0] for err in exc.errors() if err["loc"]}
+        return _validate_ideas([item for i, item in enumerate(ideas) if i not in bad])
+
+
+def _idea_prompt(
+    state: DevStromState,
+    count: int,
+    existing: list[dict] | None = None,
+    angle: str | None = None,
+) -> str:
+    """Build the idea-agent user message; *existing* ideas are listed so new ones differ."""
+    parts = [f"Tech stack: {state['tech_stack']}"]
+    if domain := state.get("domain"):
+        parts.append(f"Domain (bias ideas toward): {domain}")
+    if level := state.get("level"):
+        parts.append(f"Level (bias ideas toward): {level}")
+    if angle:
+        parts.append(f"Angle (build the idea around this): {angle}")
+    if existing:
+        parts.append("\nThese ideas already exist. Do NOT repeat or overlap with them:")
+        parts.extend(f"- {i['name']}: {i['problem_statement']}" for i in existing)
+    parts.append(f"\nWeb context:\n{state['web_context'][:4000]}\n\nOutput exactly {count} ideas as JSON:\n")
+    return "\n".join(parts)
+
+
+_ANGLES = [
+    "a data pipeline or analytics workload",
+    "a real-time or event-driven system",
+    "developer tooling or workflow automation",
+    "a user-facing product with a clear end user",
+    "reliability, observability or operations",
+    "integration with third-party APIs or legacy systems",
+    "security, compliance or access control",
+    "performance and scale under heavy load",
+]
+_TITLE_RE = re.compile(r"\*\*(.+?)\*\*")
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+
+def _idea_angles(state: DevStromState, n: int) -> list[str]:
+    """*n* distinct angle seeds: archetypes rotated by domain/level, paired with web-result titles."""
+    seed = f"{state.get('domain', '')}|{state.get('level', '')}".lower()
+    offset = int(hashlib.sha256(seed.encode()).hexdigest(), 16) % len(_ANGLES)
+    titles = _TITLE_RE.findall(state.get("web_context", ""))
+    angles = []
+    for i in range(n):
+        angle = _ANGLES[(offset + i) % len(_ANGLES)]
+        if titles:
+            angle += f' (inspiration: "{titles[i % len(titles)]}")'
+        angles.append(angle)
+    return angles
+
+
+def _idea_words(idea: dict) -> set[str]:
+    return set(_WORD_RE.findall(f"{idea['name']} {idea['problem_statement']}".lower()))
+
+
+def _is_near_duplicate(idea: dict, others: list[dict]) -> bool:
+    """Jaccard similarity of name + problem-statement words against *others*."""
+    words = _idea_words(idea)
+    for other in others:
+        other_words = _idea_words(other)
+        union = words | other_words
+        if union and len(words & other_words) / len(union) > IDEA_SIMILARITY_MAX:
+            return True
+    return False
+
+
+def _generate_one_each(state: DevStromState, angles: list[str], existing: list[dict]) -> list[dict]:
+    """One concurrent single-idea call per angle; near-duplicates of *existing* or each other are dropped."""
+    def one(angle: str) -> list[dict]:
+        return _parse_ideas(_invoke_agent("ideas", _idea_prompt(state, 1, existing, angle)))[:1]
+
+    # copy_context per call: the cache bypass flag must reach the worker threads
+    futures = [_idea_executor.submit(contextvars.copy_context().run, one, a) for a in angles]
+    kept: list[dict] = []
+    for future in futures:
+        for idea in future.result():
+            if not _is_near_duplicate(idea, existing + kept):
+                kept.append(idea)
+    return kept
+
+
+def _generate_parallel(state: DevStromState, count: int) -> list[dict]:
+    angles = _idea_angles(state, count * (1 + IDEA_REPAIR_ATTEMPTS))
+    ideas = _generate_one_each(state, angles[:count], [])
+    used = count
+    # Repair: one more concurrent wave per attempt, on fresh angles.
+    for _ in range(IDEA_REPAIR_ATTEMPTS):
+        missing = count - len(ideas)
+        if missing <= 0:
+            break
+        ideas.extend(_generate_one_each(state, angles[used:used + missing], ideas))
+        used += missing
+    return ideas
+
+
+def _generate_batch(state: DevStromState, count: int) -> list[dict]:
+    ideas = _parse_ideas(_invoke_agent("ideas", _idea_prompt(state, count)))
+
+    # Repair: ask only for the missing ideas, reusing the same web context,
+    # instead of failing the run and having the user regenerate everything.
+    for _ in range(IDEA_REPAIR_ATTEMPTS):
+        missing = count - len(ideas)
+        if missing <= 0:
+            break
+        reply = _invoke_agent("ideas", _idea_prompt(state, missing, existing=ideas))
+        ideas.extend(_parse_ideas(reply)[:missing])
+    return ideas
 
 
 def generate_ideas(state: DevStromState) -> dict:
-    tech_stack = state["tech_stack"]
-    web_context = state["web_context"]
     count = max(1, min(5, state.get("count", 3)))
+    timing = state.get("timing")
+    if timing:
+        timing.mark("generate_started")
 
-    parts = [f"Tech stack: {tech_stack}"]
-    if domain := state.get("domain"):
-        parts.append(f"Domain (bias ideas toward): {domain}")
-    if level := state.get("level"):
-        parts.append(f"Level (bias ideas toward): {level}")
-    parts.append(f"\nWeb context:\n{web_context[:4000]}\n\nOutput exactly {count} ideas as JSON:\n")
+    with llm_cache.bypass() if state.get("fresh") else nullcontext():
+        if IDEA_GENERATION_MODE == "parallel":
+            ideas = _generate_parallel(state, count)
+        else:
+            ideas = _generate_batch(state, count)
 
-    result = _get_idea_agent().invoke({
-        "messages": [{"role": "user", "content": "\n".join(parts)}],
-    })
+    if timing:
+        timing.mark("generate_finished")
 
-    ideas = _parse_ideas(_extract_last_content(result), count)
-    if not ideas:
-        ideas = [_EMPTY_IDEA.copy() for _ in range(count)]
+    ideas = ideas[:count]
+    ideas.extend(_EMPTY_IDEA.copy() for _ in range(count - len(ideas)))
 
     return {"ideas": ideas}
 
 
 # ── standalone utility (not part of the compiled graph) ──────────────────────
 
-def expand_idea(idea: dict) -> dict:
-    """Expand a single project idea into a deeper implementation plan."""
+def _trim_for_expand(idea: dict) -> dict:
     # Option A: strip fields the expand agent doesn't need to reduce input tokens
-    trimmed = {
+    return {
         k: idea[k] for k in ("name", "problem_statement", "implementation_plan")
         if k in idea
     }
-    user_content = f"Expand this project idea:\n{json.dumps(trimmed)}"
-    result = _get_expand_agent().invoke({
-        "messages": [{"role": "user", "content": user_content}],
-    })
 
-    content = _strip_markdown_fences(_extract_last_content(result))
-    try:
-        data = json.loads(content)
-        steps = data.get("extended_plan", [])
-        if isinstance(steps, list):
-            return {"idea": idea, "extended_plan": [str(s) for s in steps]}
-    except Exception:
-        pass
-    return {"idea": idea, "extended_plan": []}
+
+def _expand_one(idea: dict) -> list[str]:
+    user_content = f"Expand this project idea:\n{json.dumps(_trim_for_expand(idea))}"
+    reply = _invoke_agent("expand", user_content)
+    if (structured := _structured("expand", reply, ExpansionPlan)) is not None:
+        return list(structured.extended_plan)
+    data = _load_reply("expand", reply)
+    steps = data.get("extended_plan", []) if data else []
+    return [str(s) for s in steps] if isinstance(steps, list) else []
+
+
+def _expand_many(ideas: list[dict]) -> list[list[str] | None]:
+    """Expand several ideas with one keyed prompt; None marks an idea the reply left out."""
+    if len(ideas) == 1:
+        return [_expand_one(ideas[0])]
+    keyed = {str(i): _trim_for_expand(idea) for i, idea in enumerate(ideas, 1)}
+    user_content = f"Expand these project ideas (keyed):\n{json.dumps(keyed)}"
+    reply = _invoke_agent("expand_batch", user_content)
+    plans: dict[str, list[str]] = {}
+    if (structured := _structured("expand_batch", reply, ExpansionBatch)) is not None:
+        plans = {entry.key: list(entry.extended_plan) for entry in structured.results}
+        return [plans.get(key) for key in keyed]
+    data = _load_reply("expand_batch", reply)
+    for entry in (data or {}).get("results", []):
+        if isinstance(entry, dict) and isinstance(entry.get("extended_plan"), list):
+            plans[str(entry.get("key"))] = [str(s) for s in entry["extended_plan"]]
+    return [plans.get(key) for key in keyed]
+
+
+_expand_batcher = MicroBatcher(
+    "expand", _expand_many, window_s=EXPAND_BATCH_WINDOW_S, max_batch=EXPAND_BATCH_MAX,
+)
+
+
+def expand_idea(idea: dict) -> dict:
+    """Expand a single project idea into a deeper implementation plan.
+
+    With EXPAND_BATCH_ENABLED, concurrent calls are micro-batched into one
+    multi-idea prompt; an idea missing from the batched reply is expanded
+    on its own. Calls inside llm_cache.bypass() are not batched: the flag
+    would not reach the batcher's thread.
+    """
+    batch = EXPAND_BATCH_ENABLED and not llm_cache.bypassed()
+    steps = _expand_batcher.submit(idea) if batch else None
+    if steps is None:
+        steps = _expand_one(idea)
+    return {"idea": idea, "extended_plan": steps}
+
+
+def expand_batch_stats() -> dict:
+    """Micro-batcher metrics, for /admin/metrics."""
+    return {"enabled": EXPAND_BATCH_ENABLED, **_expand_batcher.stats()}
 
 
 # ── graph assembly ────────────────────────────────────────────────────────────
@@ -14,6 +14,26 @@ class ProjectIdea(BaseModel):
     implementation_plan: list[str] = Field(..., description="3–5 high-level implementation steps")
 
 
+class IdeaList(BaseModel):
+    """Structured-output schema for the idea agent (count is enforced by the caller)."""
+    ideas: list[ProjectIdea]
+
+
+class ExpansionPlan(BaseModel):
+    """Structured-output schema for the expand agent."""
+    extended_plan: list[str] = Field(..., description="5 concise, actionable next steps")
+
+
+class KeyedExpansion(BaseModel):
+    key: str = Field(..., description="Key of the idea this plan belongs to")
+    extended_plan: list[str] = Field(..., description="5 concise, actionable next steps")
+
+
+class ExpansionBatch(BaseModel):
+    """Structured-output schema for batched expansion (one entry per input key)."""
+    results: list[KeyedExpansion]
+
+
 class IdeasResponse(BaseModel):
     ideas: list[ProjectIdea] = Field(..., min_length=1, max_length=5)
 
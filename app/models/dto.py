@@ -14,11 +14,13 @@ class IdeasRequest(BaseModel):
     level: str | None = None
     enable_multi_query: bool = False
     count: int = Field(default=3, ge=1, le=5)
+    fresh: bool = Field(default=False, description="Skip cached LLM responses and generate new ideas")
 
 
 class ExpandRequest(BaseModel):
     run_id: str = Field(..., description="Run ID from POST /ideas response")
     pid: int = Field(..., ge=1, description="ID of the idea to expand (1-based from that run)")
+    fresh: bool = Field(default=False, description="Expand again even if a stored expansion exists")
 
 
 class ExportRequest(BaseModel):
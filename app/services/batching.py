@@ -0,0 +1,94 @@
+"""Dynamic micro-batching of concurrent calls.
+
+A MicroBatcher collects items submitted from many request threads for up
+to window_s after the first one (or until max_batch items are waiting),
+hands the whole batch to one batch function and routes each result back to
+the thread that submitted it. Batches run on a small pool, so one slow
+batch does not hold up the next window.
+
+The batch function receives a list of items and must return a list of
+results in the same order; an exception fails every item in the batch.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """Groups submit() calls into batches for *batch_fn*."""
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[list], list],
+        *,
+        window_s: float,
+        max_batch: int,
+        max_in_flight: int = 8,
+    ):
+        self.name = name
+        self._batch_fn = batch_fn
+        self._window_s = window_s
+        self._max_batch = max(1, max_batch)
+        self._queue: queue.Queue[tuple[object, Future]] = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"batch-{name}")
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+
+    def submit(self, item, timeout: float | None = None):
+        """Block until *item*'s batch has run; return its result or raise its error."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._window_s
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+            self._executor.submit(self._execute, batch)
+
+    def _execute(self, batch: list[tuple[object, Future]]) -> None:
+        try:
+            results = self._batch_fn([item for item, _ in batch])
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_ms": round(self._window_s * 1000, 1),
+                "max_batch": self._max_batch,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
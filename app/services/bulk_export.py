@@ -0,0 +1,100 @@
+"""Streaming exports: whole runs as a zip of Markdown files or one Markdown
+document, and raw rows as JSON Lines for analytics.
+
+Every format is a generator of bytes meant for a StreamingResponse: each
+idea (or row) is rendered and written out before the next one is read, so
+the archive, document or JSONL body is never held in memory. Expansions
+come from stored expanded_ideas rows only; an idea that was never expanded
+is exported with an empty detailed plan.
+"""
+
+import re
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+
+import orjson
+
+from app.services.export_formatter import idea_to_markdown
+
+FORMATS = ("zip", "md")
+MEDIA_TYPES = {"zip": "application/zip", "md": "text/markdown"}
+
+JSONL_CHUNK_BYTES = 64 * 1024  # lines are yielded in chunks of about this size
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def _slug(text: str, default: str) -> str:
+    return _SLUG_RE.sub("_", text.strip()).strip("_")[:50] or default
+
+
+def iter_run_files(runs: Iterable[dict], *, per_run_dirs: bool) -> Iterator[tuple[str, str]]:
+    """Yield (path, markdown) for every idea of every run (see run_service.iter_runs_for_export)."""
+    for run in runs:
+        prefix = f"{run['created_at'][:10]}_{_slug(run['tech_stack'], 'run')}_{run['run_id'][:8]}/" if per_run_dirs else ""
+        for pid, idea in enumerate(run["ideas"], 1):
+            plan = run["expansions"].get(pid) or []
+            name = f"{prefix}{pid:02d}_{_slug(idea.get('name') or '', 'idea')}.md"
+            yield name, idea_to_markdown(idea, plan, run["tech_stack"])
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands written bytes to the generator."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files: Iterable[tuple[str, str]]) -> Iterator[bytes]:
+    """Zip (path, text) pairs on the fly; yields the archive in pieces.
+
+    zipfile falls back to data descriptors on a non-seekable sink, so each
+    member is written once and nothing is buffered beyond the current file.
+    """
+    sink = _ChunkSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, text in files:
+            zf.writestr(zipfile.ZipInfo(name, date_time=date_time), text.encode(), zipfile.ZIP_DEFLATED)
+            if chunk := sink.drain():
+                yield chunk
+    if chunk := sink.drain():  # central directory
+        yield chunk
+
+
+def stream_markdown(files: Iterable[tuple[str, str]]) -> Iterator[bytes]:
+    """Concatenate the Markdown documents, separated by horizontal rules."""
+    first = True
+    for _, text in files:
+        yield (text if first else f"\n\n---\n\n{text}").encode()
+        first = False
+
+
+def stream(files: Iterable[tuple[str, str]], fmt: str) -> Iterator[bytes]:
+    return stream_zip(files) if fmt == "zip" else stream_markdown(files)
+
+
+def stream_jsonl(rows: Iterable[dict]) -> Iterator[bytes]:
+    """Encode rows as JSON Lines with orjson (UUIDs and datetimes included)."""
+    buf = bytearray()
+    for row in rows:
+        buf += orjson.dumps(row)
+        buf += b"\n"
+        if len(buf) >= JSONL_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
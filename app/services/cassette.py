@@ -0,0 +1,209 @@
+"""Record/replay cassettes for Tavily searches and model calls.
+
+CASSETTE_MODE selects the provider layer:
+  - off    : pass-through (default);
+  - record : every TavilyClient.search() response and every model call is
+             appended to a cassette file in CASSETTE_DIR, with its latency;
+  - replay : calls are answered from the cassettes and never reach the
+             network; a call that was not recorded raises CassetteMiss.
+
+Cassettes are JSON Lines, one file per provider (tavily.jsonl, llm.jsonl),
+so several recording sessions can simply be concatenated. Entries are keyed
+like the LLM cache (model, system prompt, messages, tools, output schema)
+or by (query, max_results) for searches; model keys include the agent's
+tools, so record and replay with the same LLM_ENGINE. A key recorded several
+times is replayed in recorded order and then cycles, so replays are
+deterministic.
+Agent entries also keep the parsed structured response, which replay
+rebuilds like an LLM cache hit. Failed calls are recorded too and replayed
+as ReplayedError.
+
+With CASSETTE_REPLAY_LATENCY > 0, replay sleeps for the recorded latency
+times that factor (1 = original timing), so production latency profiles can
+be reproduced offline. Set LLM_CACHE_ENABLED=false when replaying, or cache
+hits will hide the recorded calls.
+
+The hooks are tools._get_client (Tavily) and the agent middleware / lean
+model call in graph.py.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from pathlib import Path
+
+from langchain.agents.middleware import ModelResponse, wrap_model_call
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+from app.services import llm_cache
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()        # off | record | replay
+CASSETTE_DIR = os.getenv(
+    "CASSETTE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / ".cache" / "cassettes"),
+)
+CASSETTE_REPLAY_LATENCY = float(os.getenv("CASSETTE_REPLAY_LATENCY", "0"))  # 0 = answer immediately
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a call that is not on the cassette."""
+
+
+class ReplayedError(RuntimeError):
+    """A call that failed while recording, raised again on replay."""
+
+
+class Cassette:
+    """One provider's cassette file: append in record mode, keyed lookup in replay mode."""
+
+    def __init__(self, name: str, directory: str = CASSETTE_DIR):
+        self.name = name
+        self._path = Path(directory) / f"{name}.jsonl"
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: dict[str, list[dict]] | None = None
+        self._cursor: dict[str, int] = defaultdict(int)
+        self._counts = dict.fromkeys(("recorded", "replayed", "misses"), 0)
+
+    # ── record ────────────────────────────────────────────────────────────────
+
+    def record(self, key: str, request: dict, call: Callable[[], object], encode: Callable[[object], object]):
+        """Run call(), append its encoded response (or error) and latency, and return/raise its result."""
+        start = time.perf_counter()
+        entry = {"key": key, "request": request}
+        try:
+            result = call()
+            entry["response"] = encode(result)
+            return result
+        except Exception as exc:
+            entry["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            entry["latency_s"] = round(time.perf_counter() - start, 4)
+            self._append(entry)
+
+    def _append(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self._path, "a", buffering=1, encoding="utf-8")
+            self._file.write(line)
+            self._counts["recorded"] += 1
+
+    # ── replay ────────────────────────────────────────────────────────────────
+
+    def _load(self) -> dict[str, list[dict]]:
+        entries: dict[str, list[dict]] = defaultdict(list)
+        if self._path.exists():
+            with open(self._path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry["key"]].append(entry)
+        return entries
+
+    def replay(self, key: str, request: dict):
+        """Return the next recorded response for *key* (raw JSON value)."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            recorded = self._entries.get(key)
+            if not recorded:
+                self._counts["misses"] += 1
+                raise CassetteMiss(f"{self.name}: no recording for {json.dumps(request, default=str)[:200]}")
+            entry = recorded[self._cursor[key] % len(recorded)]
+            self._cursor[key] += 1
+            self._counts["replayed"] += 1
+        if CASSETTE_REPLAY_LATENCY > 0:
+            time.sleep(entry["latency_s"] * CASSETTE_REPLAY_LATENCY)
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return entry["response"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counts, "keys": len(self._entries) if self._entries is not None else None}
+
+
+_tavily = Cassette("tavily")
+_llm = Cassette("llm")
+
+
+def stats() -> dict:
+    return {"mode": CASSETTE_MODE, "tavily": _tavily.stats(), "llm": _llm.stats()}
+
+
+# ── Tavily ────────────────────────────────────────────────────────────────────
+
+class TavilyCassette:
+    """Duck-types TavilyClient.search(); wraps a real client when recording."""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        request = {"query": query, "max_results": max_results, **kwargs}
+        key = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+        if CASSETTE_MODE == "replay":
+            return _tavily.replay(key, request)
+        return _tavily.record(
+            key, request, lambda: self._client.search(query=query, max_results=max_results, **kwargs), dict,
+        )
+
+
+def wrap_tavily(make_client: Callable[[], object]):
+    """Return the Tavily client for the current mode (no real client, or API key, in replay)."""
+    if CASSETTE_MODE == "replay":
+        return TavilyCassette()
+    client = make_client()
+    return TavilyCassette(client) if CASSETTE_MODE == "record" else client
+
+
+# ── model calls ───────────────────────────────────────────────────────────────
+
+def _describe(messages: list[BaseMessage]) -> dict:
+    """Human-readable request summary stored next to the key (the key alone is a hash)."""
+    return {"messages": [{"type": m.type, "content": m.content} for m in messages]}
+
+
+def model_call(key: str, messages: list[BaseMessage], call: Callable[[], list[BaseMessage]]) -> list[BaseMessage]:
+    """Run (record), answer from the cassette (replay) or pass through a model call."""
+    if CASSETTE_MODE == "replay":
+        return messages_from_dict(_llm.replay(key, _describe(messages)))
+    if CASSETTE_MODE == "record":
+        return _llm.record(key, _describe(messages), call, messages_to_dict)
+    return call()
+
+
+def _encode_response(response: ModelResponse) -> dict:
+    return {
+        "messages": messages_to_dict(response.result),
+        "structured": llm_cache.dump_structured(response.structured_response),
+    }
+
+
+@wrap_model_call
+def cassette_model_call(request, handler):
+    """Agent middleware: record or replay the model call (innermost, below the LLM cache).
+
+    The structured response is recorded with the messages and rebuilt on
+    replay, so replayed runs take the same structured-output path as live ones.
+    """
+    if CASSETTE_MODE not in ("record", "replay"):
+        return handler(request)
+    key = llm_cache.request_key(request)
+    if CASSETTE_MODE == "record":
+        return _llm.record(key, _describe(request.messages), lambda: handler(request), _encode_response)
+    entry = _llm.replay(key, _describe(request.messages))
+    if isinstance(entry, list):  # recorded before structured responses were kept
+        return ModelResponse(result=messages_from_dict(entry))
+    return ModelResponse(
+        result=messages_from_dict(entry["messages"]),
+        structured_response=llm_cache.load_structured(request, entry["structured"]),
+    )
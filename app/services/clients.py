@@ -0,0 +1,176 @@
+"""Registry of provider clients, one per (provider, API-key fingerprint).
+
+What this delivers is OpenAI client reuse for the lean engine: its chat
+model is built once per API key and leased to every call, so the model's
+httpx connection pool is shared across requests. Clients are keyed by a
+SHA-256 fingerprint of the key, never the key itself.
+
+Not covered:
+  - Tavily is registered too, but the pinned tavily SDK sends every search
+    with module-level requests.post, so there is no pool to reuse; the
+    registry only saves constructing a client per search;
+  - the deep agents build their chat model from MODEL once per agent
+    singleton and keep it for the life of the process;
+  - per-user (bring-your-own) keys: every request still runs as
+    ANONYMOUS_USER_ID, so there is no user key to look up yet.
+
+Callers hold a client through lease(). Clients idle for longer than
+CLIENT_IDLE_TTL_S are dropped, and so are the least recently used ones
+beyond CLIENT_CACHE_MAX. A dropped client is closed right away if nobody
+holds it, otherwise when its last lease ends.
+
+Providers register a factory (api_key → client); see graph.py (openai) and
+tools.py (tavily).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+CLIENT_CACHE_MAX = int(os.getenv("CLIENT_CACHE_MAX", "256"))        # clients kept across all providers
+CLIENT_IDLE_TTL_S = float(os.getenv("CLIENT_IDLE_TTL_S", "900"))    # drop clients unused this long
+
+
+def fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _close(client) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            logger.exception("clients: closing %r failed", type(client).__name__)
+
+
+class _Entry:
+    """A cached client with its lease count."""
+
+    def __init__(self, client, now: float):
+        self.client = client
+        self.last_used = now
+        self.leases = 0
+        self.dropped = False  # out of the registry; closed when the last lease ends
+
+
+class ClientRegistry:
+    """LRU + idle-TTL cache of provider clients; never closes a client that is leased."""
+
+    def __init__(self, *, max_clients: int = CLIENT_CACHE_MAX, idle_ttl_s: float = CLIENT_IDLE_TTL_S):
+        self._max_clients = max(1, max_clients)
+        self._idle_ttl_s = idle_ttl_s
+        self._lock = threading.Lock()
+        self._factories: dict[str, Callable[[str], object]] = {}
+        # (provider, fingerprint) → entry; least recently used first.
+        self._clients: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._counts = dict.fromkeys(("hits", "misses", "evicted_idle", "evicted_lru"), 0)
+
+    def register(self, provider: str, factory: Callable[[str], object]) -> None:
+        self._factories[provider] = factory
+
+    @contextmanager
+    def lease(self, provider: str, api_key: str):
+        """Yield the shared client for this provider and key, building it on first use."""
+        entry = self._acquire(provider, api_key)
+        try:
+            yield entry.client
+        finally:
+            self._release(entry)
+
+    def _acquire(self, provider: str, api_key: str) -> _Entry:
+        key = (provider, fingerprint(api_key))
+        now = time.monotonic()
+        with self._lock:
+            stale = self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry.leases += 1
+                entry.last_used = now
+                self._clients.move_to_end(key)
+                self._counts["hits"] += 1
+        for client in stale:
+            _close(client)
+        if entry is not None:
+            return entry
+
+        client = self._factories[provider](api_key)  # outside the lock: may be slow
+        with self._lock:
+            if (entry := self._clients.get(key)) is not None:
+                duplicate = client  # another thread built it first
+                self._clients.move_to_end(key)
+            else:
+                duplicate = None
+                entry = self._clients[key] = _Entry(client, now)
+                self._counts["misses"] += 1
+            entry.leases += 1
+            overflow = []
+            while len(self._clients) > self._max_clients:
+                overflow += self._drop(next(iter(self._clients)))
+                self._counts["evicted_lru"] += 1
+        for old in ([duplicate] if duplicate is not None else []) + overflow:
+            _close(old)
+        return entry
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            close = entry.dropped and entry.leases == 0
+        if close:
+            _close(entry.client)
+
+    def _drop(self, key: tuple[str, str]) -> list:
+        """Remove an entry (caller holds the lock); returns its client if it can be closed now."""
+        entry = self._clients.pop(key)
+        entry.dropped = True
+        return [entry.client] if entry.leases == 0 else []
+
+    def _evict_idle(self, now: float) -> list:
+        """Drop clients idle past the TTL (caller holds the lock; close them after releasing it)."""
+        stale = []
+        while self._clients:
+            key, entry = next(iter(self._clients.items()))
+            if now - entry.last_used <= self._idle_ttl_s:
+                break
+            stale += self._drop(key)
+            self._counts["evicted_idle"] += 1
+        return stale
+
+    def close_all(self) -> None:
+        with self._lock:
+            clients = []
+            for key in list(self._clients):
+                clients += self._drop(key)
+        for client in clients:
+            _close(client)
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_provider: dict[str, int] = {}
+            for provider, _ in self._clients:
+                per_provider[provider] = per_provider.get(provider, 0) + 1
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_rate": round(self._counts["hits"] / lookups, 3) if lookups else 0.0,
+                "clients": per_provider,
+                "leased": sum(entry.leases for entry in self._clients.values()),
+            }
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+_registry = ClientRegistry()
+
+register = _registry.register
+lease = _registry.lease
+close_all = _registry.close_all
+stats = _registry.stats
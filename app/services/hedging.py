@@ -0,0 +1,173 @@
+"""Hedged requests for tail-latency control.
+
+A Hedger runs a call and, if it has not finished by the p-th percentile of
+recently observed latencies, starts one identical backup call. Whichever
+finishes first wins; the other is cancelled if it has not started, and
+otherwise abandoned (its result is discarded when it completes — a blocking
+HTTP call inside a thread cannot be interrupted). A budget caps the
+fraction of calls that may be hedged, so hedging cannot double upstream
+load during a broad slowdown.
+
+Latency percentiles are computed from a rolling window of provider-call
+latencies, including those of abandoned attempts, so the threshold tracks
+the real distribution rather than only the winners. The call reports them
+with observe() from inside the attempt; time spent waiting for a limiter
+slot and attempts answered from a cache report nothing, so they neither
+lower the threshold nor count as samples.
+
+A hedge also holds a limiter slot and tokens. A Hedger given a saturated()
+check does not hedge while it returns True (e.g. callers are already queued
+at the provider limiter), so backups never take capacity from queued calls.
+"""
+
+import contextvars
+import os
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))     # start backup after pXX latency
+HEDGE_MAX_FRACTION = float(os.getenv("HEDGE_MAX_FRACTION", "0.1"))  # cap on hedged / total calls
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))      # no hedging until this many samples
+HEDGE_WINDOW = 500                                                 # latency samples kept
+
+# Provider-call latencies reported by the attempt running in this context.
+_observed: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar("hedge_observed", default=None)
+
+
+def observe(seconds: float) -> None:
+    """Report the latency of one provider call made by the current attempt (no-op outside one)."""
+    if (samples := _observed.get()) is not None:
+        samples.append(seconds)
+
+
+# Shared by all hedgers: primary and backup attempts run here while the
+# caller waits, so the pool must cover two attempts per concurrent caller.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("HEDGE_MAX_THREADS", "32")), thread_name_prefix="hedge",
+)
+
+
+class LatencyTracker:
+    """Rolling window of latencies with percentile lookup."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, *, min_samples: int = 1) -> float | None:
+        """Return the p-th percentile (0–100), or None with fewer than min_samples."""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedger:
+    """Runs calls with at most one hedge, within a hedge-fraction budget."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        percentile: float = HEDGE_PERCENTILE,
+        max_fraction: float = HEDGE_MAX_FRACTION,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        tracker: LatencyTracker | None = None,
+        saturated: Callable[[], bool] | None = None,
+    ):
+        self.name = name
+        self._saturated = saturated
+        self._percentile = percentile
+        self._max_fraction = max_fraction
+        self._min_samples = min_samples
+        self.tracker = tracker or LatencyTracker()
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._abandoned = 0
+        self._skipped_saturated = 0
+
+    def _attempt(self, fn: Callable):
+        """Run fn, then record the provider-call latency it observe()d (if any)."""
+        samples: list[float] = []
+        token = _observed.set(samples)
+        try:
+            return fn()
+        finally:
+            _observed.reset(token)
+            if samples:
+                self.tracker.record(sum(samples))
+
+    def _submit(self, fn: Callable) -> Future:
+        """Run fn on the pool with the caller's contextvars."""
+        return _executor.submit(contextvars.copy_context().run, self._attempt, fn)
+
+    def _may_hedge(self) -> bool:
+        if self._saturated is not None and self._saturated():
+            with self._lock:
+                self._skipped_saturated += 1
+            return False
+        with self._lock:
+            return (self._hedged + 1) <= self._max_fraction * self._calls
+
+    def call(self, fn: Callable):
+        """Return fn()'s result, hedging once if it runs past the latency threshold."""
+        with self._lock:
+            self._calls += 1
+        threshold = self.tracker.percentile(self._percentile, min_samples=self._min_samples)
+        if threshold is None:
+            # Not enough data yet: run inline and learn from it.
+            return self._attempt(fn)
+
+        primary = self._submit(fn)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._may_hedge():
+            return primary.result()
+
+        with self._lock:
+            self._hedged += 1
+        backup = self._submit(fn)
+        pending = {primary, backup}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    for loser in pending:
+                        if not loser.cancel():
+                            with self._lock:
+                                self._abandoned += 1
+                    if f is backup:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return f.result()
+                error = f.exception()
+        raise error
+
+    def stats(self) -> dict:
+        threshold = self.tracker.percentile(self._percentile, min_samples=self._min_samples)
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "hedged": self._hedged,
+                "hedge_fraction": round(self._hedged / self._calls, 4) if self._calls else 0.0,
+                "hedge_wins": self._hedge_wins,
+                "abandoned": self._abandoned,
+                "skipped_saturated": self._skipped_saturated,
+                "samples": len(self.tracker),
+                "threshold_s": round(threshold, 3) if threshold is not None else None,
+            }
@@ -0,0 +1,85 @@
+"""Idea-generation service.
+
+Runs the LangGraph pipeline for an IdeasRequest, attaches position IDs and
+persists the run. Shared by the synchronous POST /ideas endpoint and the
+background job workers, so both produce identical runs.
+"""
+
+from collections.abc import Callable
+
+from app.graph import app as graph_app
+from app.models.dto import IdeasRequest
+from app.services import pre_expand
+from app.services.run_service import save_run
+
+
+class IdeaCountMismatch(Exception):
+    """The graph returned a different number of ideas than requested."""
+
+
+def build_inputs(body: IdeasRequest) -> dict:
+    """Translate an IdeasRequest into initial graph state."""
+    inputs = {"tech_stack": body.tech_stack, "count": body.count}
+    if body.domain and body.domain.strip():
+        inputs["domain"] = body.domain.strip()
+    if body.level and body.level.strip():
+        inputs["level"] = body.level.strip()
+    if body.enable_multi_query:
+        inputs["enable_multi_query"] = True
+    if body.fresh:
+        inputs["fresh"] = True
+    return inputs
+
+
+def _invoke_graph(inputs: dict, on_node: Callable[[str], None] | None) -> dict:
+    """Run the graph; when on_node is given, report each node as it completes."""
+    if on_node is None:
+        return graph_app.invoke(inputs)
+    state = dict(inputs)
+    for chunk in graph_app.stream(inputs, stream_mode="updates"):
+        for node, update in chunk.items():
+            if update:
+                state.update(update)
+            on_node(node)
+    return state
+
+
+def generate_run(
+    body: IdeasRequest,
+    *,
+    on_node: Callable[[str], None] | None = None,
+) -> dict:
+    """Generate ideas for *body*, persist the run and return {ideas, run_id}.
+
+    Raises:
+        IdeaCountMismatch: if the graph did not return body.count ideas.
+    """
+    inputs = build_inputs(body)
+    result = _invoke_graph(inputs, on_node)
+    ideas = result.get("ideas", [])
+    if len(ideas) != body.count:
+        raise IdeaCountMismatch(f"Expected {body.count} ideas from graph, got {len(ideas)}")
+
+    # Attach 1-based position IDs
+    out = []
+    for i, idea in enumerate(ideas, 1):
+        d = idea if isinstance(idea, dict) else (
+            idea.model_dump() if hasattr(idea, "model_dump") else {}
+        )
+        d["pid"] = i
+        out.append(d)
+
+    # Persist run to database
+    run_id = save_run(
+        tech_stack=body.tech_stack,
+        domain=inputs.get("domain"),
+        level=inputs.get("level"),
+        count=body.count,
+        enable_multi_query=body.enable_multi_query,
+        ideas=out,
+        web_context=result.get("web_context"),
+    )
+    if pre_expand.PRE_EXPAND_ENABLED:
+        pre_expand.schedule(run_id, out)
+
+    return {"ideas": out, "run_id": run_id}
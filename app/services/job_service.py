@@ -0,0 +1,132 @@
+"""Job persistence service.
+
+The `jobs` table is the source of truth for asynchronous generation jobs.
+The in-memory queue only carries job IDs; workers claim a job here before
+running it, so a job is never executed twice even if several API processes
+recover the same backlog after a restart.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.services.db import get_session
+from app.services.models import ANONYMOUS_USER_ID, Job
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _job_dict(job: Job) -> dict:
+    return {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "request": job.request,
+        "progress": job.progress,
+        "run_id": str(job.run_id) if job.run_id else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_job(
+    *,
+    kind: str,
+    request: dict,
+    user_id: uuid.UUID = ANONYMOUS_USER_ID,
+) -> str:
+    """Insert a queued job and return its job_id."""
+    job = Job(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        kind=kind,
+        status=QUEUED,
+        request=request,
+        created_at=_now(),
+        updated_at=_now(),
+    )
+    with get_session() as session:
+        session.add(job)
+    return str(job.id)
+
+
+def get_job(*, job_id: str) -> dict | None:
+    """Fetch a job by ID. Returns None if it does not exist."""
+    with get_session() as session:
+        job = session.get(Job, uuid.UUID(job_id))
+        return _job_dict(job) if job else None
+
+
+def claim_job(*, job_id: str) -> dict | None:
+    """Atomically move a queued job to running.
+
+    Returns the job, or None if another worker already claimed it (or it no
+    longer exists).
+    """
+    with get_session() as session:
+        job = session.execute(
+            update(Job)
+            .where(Job.id == uuid.UUID(job_id), Job.status == QUEUED)
+            .values(status=RUNNING, updated_at=_now())
+            .returning(Job)
+        ).scalar_one_or_none()
+        return _job_dict(job) if job else None
+
+
+def update_progress(*, job_id: str, progress: str) -> None:
+    """Record the last graph node a running job has completed."""
+    with get_session() as session:
+        session.execute(
+            update(Job)
+            .where(Job.id == uuid.UUID(job_id))
+            .values(progress=progress, updated_at=_now())
+        )
+
+
+def mark_succeeded(*, job_id: str, run_id: str) -> None:
+    with get_session() as session:
+        session.execute(
+            update(Job)
+            .where(Job.id == uuid.UUID(job_id))
+            .values(status=SUCCEEDED, run_id=uuid.UUID(run_id), error=None, updated_at=_now())
+        )
+
+
+def mark_failed(*, job_id: str, error: str) -> None:
+    with get_session() as session:
+        session.execute(
+            update(Job)
+            .where(Job.id == uuid.UUID(job_id))
+            .values(status=FAILED, error=error, updated_at=_now())
+        )
+
+
+def recover_unfinished(*, stale_after_s: float) -> list[str]:
+    """Requeue jobs interrupted by a restart and return every queued job_id.
+
+    A running job counts as interrupted once it has made no progress for
+    *stale_after_s* seconds (its worker would have bumped updated_at).
+    """
+    cutoff = _now() - timedelta(seconds=stale_after_s)
+    with get_session() as session:
+        session.execute(
+            update(Job)
+            .where(Job.status == RUNNING, Job.updated_at < cutoff)
+            .values(status=QUEUED, updated_at=_now())
+        )
+        rows = session.execute(
+            select(Job.id)
+            .where(Job.status == QUEUED)
+            .order_by(Job.created_at)
+        ).scalars().all()
+        return [str(r) for r in rows]
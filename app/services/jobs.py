@@ -0,0 +1,208 @@
+"""In-process job queue and worker pool for asynchronous idea generation.
+
+POST /jobs/ideas writes a job row (services/job_service.py) and puts its ID
+on a JobQueue; a bounded pool of worker threads takes IDs off the queue,
+claims the job in the database and runs the graph, reporting each node it
+reaches as progress. Request concurrency (API threads) is thereby decoupled
+from generation concurrency (JOB_WORKERS).
+
+The queue backend is pluggable: anything implementing JobQueue works. The
+only backend shipped is LocalJobQueue, an in-memory stand-in. Because the
+job row, not the queue, is durable, unfinished jobs are recovered from the
+database on startup whichever backend is used. Recovered jobs that do not
+fit in the queue are held back and enqueued by the workers as room frees up.
+"""
+
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from typing import Protocol
+
+from app.models.dto import IdeasRequest
+from app.services import job_service
+from app.services.idea_service import generate_run
+
+logger = logging.getLogger(__name__)
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))                   # concurrent generations
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))             # queued jobs before 503
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "local")
+JOB_STALE_AFTER_S = float(os.getenv("JOB_STALE_AFTER_S", "300"))   # running w/o progress → requeue
+
+IDEAS_JOB = "ideas"
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+# ── queue backends ────────────────────────────────────────────────────────────
+
+class JobQueue(Protocol):
+    """Minimal contract for a job-ID queue backend."""
+
+    def put(self, job_id: str) -> None:
+        """Enqueue a job ID. Raise QueueFull when at capacity."""
+
+    def get(self, timeout: float) -> str | None:
+        """Dequeue a job ID, or return None after *timeout* seconds."""
+
+    def qsize(self) -> int:
+        """Approximate number of queued job IDs."""
+
+
+class LocalJobQueue:
+    """In-memory FIFO backend for a single API process."""
+
+    def __init__(self, maxsize: int = JOB_QUEUE_MAX):
+        self._queue: queue.Queue[str] = queue.Queue(maxsize=maxsize)
+
+    def put(self, job_id: str) -> None:
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            raise QueueFull(f"job queue is full ({self._queue.maxsize} jobs)") from None
+
+    def get(self, timeout: float) -> str | None:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+_BACKENDS: dict[str, type] = {"local": LocalJobQueue}
+
+
+def make_queue(backend: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    try:
+        return _BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown JOB_QUEUE_BACKEND {backend!r}; expected one of {sorted(_BACKENDS)}") from None
+
+
+# ── worker pool ───────────────────────────────────────────────────────────────
+
+class JobWorkerPool:
+    """Fixed-size pool of threads that execute queued jobs."""
+
+    def __init__(self, job_queue: JobQueue, *, workers: int = JOB_WORKERS):
+        self._queue = job_queue
+        self._workers = workers
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._busy = 0
+        # Recovered job IDs that did not fit in the queue at startup.
+        self._backlog: deque[str] = deque()
+        self._completed = 0
+        self._failed = 0
+
+    def submit(self, job_id: str) -> None:
+        self._queue.put(job_id)
+
+    def start(self) -> None:
+        """Start the workers and requeue jobs left unfinished by a previous process."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self._workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        try:
+            recovered = job_service.recover_unfinished(stale_after_s=JOB_STALE_AFTER_S)
+        except Exception:
+            logger.exception("jobs: could not recover unfinished jobs")
+            return
+        with self._lock:
+            self._backlog.extend(recovered)
+        self._drain_backlog()
+        if self._backlog:
+            logger.warning("jobs: queue full during recovery; %d jobs will be enqueued as workers free up",
+                           len(self._backlog))
+
+    def _drain_backlog(self) -> None:
+        """Move held-back recovered jobs into the queue while it has room."""
+        with self._lock:
+            while self._backlog:
+                try:
+                    self._queue.put(self._backlog[0])
+                except QueueFull:
+                    return
+                self._backlog.popleft()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop taking new jobs. Jobs still running are recovered on next start."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads.clear()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            if self._backlog:
+                self._drain_backlog()
+            job_id = self._queue.get(timeout=0.5)
+            if job_id is None:
+                continue
+            try:
+                job = job_service.claim_job(job_id=job_id)
+            except Exception:
+                # Left queued in the DB; startup / stale-job recovery picks it up.
+                logger.exception("jobs: could not claim job %s", job_id)
+                continue
+            if job is None:
+                continue  # already claimed elsewhere, or deleted
+            with self._lock:
+                self._busy += 1
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+    def _execute(self, job: dict) -> None:
+        job_id = job["job_id"]
+        try:
+            if job["kind"] != IDEAS_JOB:
+                raise ValueError(f"Unknown job kind {job['kind']!r}")
+            body = IdeasRequest.model_validate(job["request"])
+            result = generate_run(
+                body,
+                on_node=lambda node: job_service.update_progress(job_id=job_id, progress=node),
+            )
+            job_service.mark_succeeded(job_id=job_id, run_id=result["run_id"])
+            with self._lock:
+                self._completed += 1
+        except Exception as exc:
+            logger.exception("jobs: job %s failed", job_id)
+            with self._lock:
+                self._failed += 1
+            try:
+                job_service.mark_failed(job_id=job_id, error=str(exc))
+            except Exception:
+                # Still "running" in the DB: stale-job recovery requeues it.
+                logger.exception("jobs: could not mark job %s failed", job_id)
+
+    def stats(self) -> dict:
+        """Worker utilisation and queue depth, for /admin/metrics."""
+        with self._lock:
+            return {
+                "backend": JOB_QUEUE_BACKEND,
+                "workers": self._workers,
+                "busy_workers": self._busy,
+                "queue_depth": self._queue.qsize(),
+                "recovery_backlog": len(self._backlog),
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+pool = JobWorkerPool(make_queue())
@@ -0,0 +1,198 @@
+"""Admission control for upstream providers (OpenAI, Tavily).
+
+Every outbound provider call goes through ``limiter(provider).acquire()``,
+which combines:
+  - a token bucket (sustained calls/second plus a burst allowance), and
+  - a max-concurrency cap (calls in flight at once),
+behind a FIFO queue so waiters are admitted in arrival order. A caller that
+cannot be admitted within the wait timeout gets AdmissionTimeout, which the
+API turns into 503 with a Retry-After header instead of letting a burst
+become a wall of upstream 429s and retries.
+
+Limits are read per provider from the environment, e.g. OPENAI_RATE_PER_S,
+OPENAI_BURST, OPENAI_MAX_CONCURRENCY (a value of 0 disables that limit).
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+WAIT_TIMEOUT_S = float(os.getenv("LIMITER_WAIT_TIMEOUT_S", "30"))
+_WAIT_SAMPLES = 1000  # recent wait times kept for percentile metrics
+
+_DEFAULTS = {
+    # provider: (rate_per_s, burst, max_concurrency)
+    "openai": (2.0, 5, 8),
+    "tavily": (5.0, 10, 10),
+}
+
+
+class AdmissionTimeout(Exception):
+    """A provider call was not admitted within the limiter's wait timeout."""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(f"{provider} is at capacity; retry in {retry_after}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class ProviderLimiter:
+    """Token bucket + concurrency cap with a fair (FIFO) wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate_per_s: float,
+        burst: int,
+        max_concurrency: int,
+        wait_timeout_s: float = WAIT_TIMEOUT_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self._rate = rate_per_s
+        self._burst = max(1, burst)
+        self._max_concurrency = max_concurrency
+        self._wait_timeout_s = wait_timeout_s
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._tokens = float(self._burst)
+        self._refilled_at = clock()
+        self._waiters: deque[object] = deque()
+        self._in_flight = 0
+
+        self._admitted = 0
+        self._rejected = 0
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    # ── admission ───────────────────────────────────────────────────────────
+
+    def _refill(self, now: float) -> None:
+        if self._rate > 0:
+            self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def _blocked_for(self, now: float) -> float | None:
+        """0 if a call may start now, seconds until a token frees up, or None (wait for a release)."""
+        if self._max_concurrency and self._in_flight >= self._max_concurrency:
+            return None
+        if self._rate > 0:
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self._rate
+        return 0.0
+
+    def _retry_after(self) -> int:
+        if self._rate > 0:
+            return max(1, math.ceil(len(self._waiters) / self._rate))
+        return max(1, math.ceil(self._wait_timeout_s))
+
+    @contextmanager
+    def acquire(self):
+        """Block until admitted (FIFO), hold a concurrency slot for the duration of the block.
+
+        Raises:
+            AdmissionTimeout: if not admitted within the wait timeout.
+        """
+        ticket = object()
+        start = self._clock()
+        deadline = start + self._wait_timeout_s
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = self._clock()
+                    blocked = self._blocked_for(now) if self._waiters[0] is ticket else None
+                    if blocked == 0.0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._rejected += 1
+                        raise AdmissionTimeout(self.name, self._retry_after())
+                    self._cond.wait(remaining if blocked is None else min(blocked, remaining))
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()  # next in line re-checks
+            if self._rate > 0:
+                self._tokens -= 1
+            self._in_flight += 1
+            self._admitted += 1
+            self._waits.append(self._clock() - start)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) under this limiter."""
+        with self.acquire():
+            return fn(*args, **kwargs)
+
+    # ── metrics ─────────────────────────────────────────────────────────────
+
+    def queue_depth(self) -> int:
+        """Callers currently waiting for admission."""
+        with self._cond:
+            return len(self._waiters)
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "rate_per_s": self._rate,
+                "burst": self._burst,
+                "max_concurrency": self._max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "wait_avg_s": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                "wait_p95_s": round(waits[int(0.95 * (len(waits) - 1))], 4) if waits else 0.0,
+                "wait_max_s": round(waits[-1], 4) if waits else 0.0,
+            }
+
+
+# ── registry ──────────────────────────────────────────────────────────────────
+
+_limiters: dict[str, ProviderLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def _from_env(provider: str) -> ProviderLimiter:
+    rate, burst, concurrency = _DEFAULTS.get(provider, (0.0, 1, 0))
+    prefix = provider.upper()
+    return ProviderLimiter(
+        provider,
+        rate_per_s=float(os.getenv(f"{prefix}_RATE_PER_S", rate)),
+        burst=int(os.getenv(f"{prefix}_BURST", burst)),
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", concurrency)),
+    )
+
+
+def limiter(provider: str) -> ProviderLimiter:
+    """Return the process-wide limiter for *provider*, creating it from env on first use."""
+    if (lim := _limiters.get(provider)) is not None:
+        return lim
+    with _registry_lock:
+        if provider not in _limiters:
+            _limiters[provider] = _from_env(provider)
+        return _limiters[provider]
+
+
+def set_limiter(provider: str, lim: ProviderLimiter) -> None:
+    """Replace a provider's limiter (used by benchmarks and stub setups)."""
+    with _registry_lock:
+        _limiters[provider] = lim
+
+
+def stats() -> dict:
+    """Per-provider limiter metrics, for /admin/metrics."""
+    return {name: lim.stats() for name, lim in list(_limiters.items())}
@@ -0,0 +1,248 @@
+"""Content-addressed cache of model responses, shared by the idea and expand agents.
+
+Identical prompts are common: re-expanding an idea from History sends the
+same expand prompt, and repeating a search sends the same idea prompt.
+This cache sits at the model-call layer — it is installed on both deep
+agents through the ``wrap_model_call`` middleware hook — and short-circuits
+a call whose (model, system prompt, messages, tools) have been answered
+before.
+
+Entries hold the reply messages plus, for agents with a response_format,
+the parsed structured response (as JSON), so a hit returns the same
+ModelResponse the model call did.
+
+Entries live in a local SQLite file with a TTL and a size cap. A caller that
+wants a fresh answer wraps the call in ``with llm_cache.bypass():`` — the
+response is then fetched from the model and written back to the cache.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from langchain.agents.middleware import ModelResponse, wrap_model_call
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from pydantic import BaseModel
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / ".cache" / "llm_cache.sqlite3"),
+)
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass():
+    """Skip cache lookups for model calls made inside this block (results are still stored)."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def bypassed() -> bool:
+    """True inside a bypass() block."""
+    return _bypass.get()
+
+
+# ── cache keys ────────────────────────────────────────────────────────────────
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _message_fingerprint(msg: BaseMessage) -> dict:
+    """Fields that determine the model's answer (message IDs and metadata excluded)."""
+    fp = {"type": msg.type, "content": msg.content}
+    if tool_calls := getattr(msg, "tool_calls", None):
+        fp["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in tool_calls]
+    return fp
+
+
+def make_key(
+    model_name: str,
+    system_prompt: str,
+    messages: list[BaseMessage],
+    tool_names: list[str] | None = None,
+    *,
+    response_format: str = "",
+) -> str:
+    """Hash of model name, system prompt hash, message hash, available tools and output schema."""
+    messages_json = json.dumps([_message_fingerprint(m) for m in messages], sort_keys=True, default=str)
+    parts = [
+        model_name, _sha(system_prompt), _sha(messages_json),
+        ",".join(sorted(tool_names or [])), response_format,
+    ]
+    return _sha("\x1f".join(parts))
+
+
+# ── storage ───────────────────────────────────────────────────────────────────
+
+class LLMCache:
+    """SQLite-backed key → (list[BaseMessage], structured JSON) store with TTL and an entry cap."""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        *,
+        ttl_s: float = LLM_CACHE_TTL_S,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self._path = path
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> tuple[list[BaseMessage], object] | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None or time.time() - row[1] > self._ttl_s:
+                self._misses += 1
+                return None
+            self._hits += 1
+        entry = json.loads(row[0])
+        if isinstance(entry, list):  # written before structured responses were stored
+            return messages_from_dict(entry), None
+        return messages_from_dict(entry["messages"]), entry.get("structured")
+
+    def put(self, key: str, messages: list[BaseMessage], structured: object = None) -> None:
+        payload = json.dumps({"messages": messages_to_dict(messages), "structured": structured}, default=str)
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            self._writes += 1
+            if self._writes % 100 == 1:
+                self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop expired entries, then the oldest beyond the entry cap."""
+        db.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self._ttl_s,))
+        db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self._bypassed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": LLM_CACHE_ENABLED,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "bypassed": self._bypassed,
+                "writes": self._writes,
+            }
+
+
+_cache = LLMCache()
+stats = _cache.stats
+
+
+# ── call-site helpers ─────────────────────────────────────────────────────────
+
+def _cached(key: str, call) -> tuple[list[BaseMessage], object]:
+    """Return the cached entry for *key*, or run call() (→ (messages, structured JSON)) and store it."""
+    if _bypass.get():
+        _cache.note_bypass()
+    elif (hit := _cache.get(key)) is not None:
+        return hit
+    messages, structured = call()
+    _cache.put(key, messages, structured)
+    return messages, structured
+
+
+def cached_call(key: str, call) -> list[BaseMessage]:
+    """Return cached messages for *key*, or run call() (→ list[BaseMessage]) and store them."""
+    if not LLM_CACHE_ENABLED:
+        return call()
+    return _cached(key, lambda: (call(), None))[0]
+
+
+def _model_name(model) -> str:
+    return str(getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__)
+
+
+def request_key(request) -> str:
+    """make_key() for an agent's ModelRequest."""
+    schema = getattr(request.response_format, "schema", None)
+    return make_key(
+        _model_name(request.model),
+        request.system_message.text if request.system_message else "",
+        request.messages,
+        [getattr(t, "name", None) or t.get("name", "") for t in request.tools],
+        response_format=getattr(schema, "__name__", "") if schema else "",
+    )
+
+
+def dump_structured(value):
+    """JSON form of a ModelResponse.structured_response (pydantic models are dumped)."""
+    return value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+
+
+def load_structured(request, value):
+    """Rebuild the schema instance the agent would have parsed (pydantic schemas only)."""
+    schema = getattr(request.response_format, "schema", None)
+    if value is not None and isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_validate(value)
+    return value
+
+
+@wrap_model_call
+def cache_model_call(request, handler):
+    """Agent middleware: serve a model call from the cache when possible."""
+    if not LLM_CACHE_ENABLED:
+        return handler(request)
+
+    live: list[ModelResponse] = []
+
+    def call():
+        response = handler(request)
+        live.append(response)
+        return response.result, dump_structured(response.structured_response)
+
+    messages, structured = _cached(request_key(request), call)
+    if live:
+        return live[0]
+    return ModelResponse(result=messages, structured_response=load_structured(request, structured))
@@ -1,6 +1,7 @@
 """SQLAlchemy ORM models mapped to the Dev-Strom V3 database tables.
 
-Each class mirrors a table created in migration 001_initial_schema.
+Each class mirrors a table created in migration 001_initial_schema
+(or a later migration, noted on the class).
 Only tables needed by current V3 tickets are modelled here — add
 the remaining tables (user_api_keys, web_chunks) when their tickets
 are implemented.
@@ -105,3 +106,33 @@ class ExpandedIdea(Base):
     )
 
     run: Mapped["Run"] = relationship(back_populates="expanded_ideas")
+
+
+# ── jobs ───────────────────────────────────────────────────────────────────────
+class Job(Base):
+    """Durable record of an asynchronous generation job (migration 003)."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(Text, server_default="queued", nullable=False)
+    request: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    progress: Mapped[str | None] = mapped_column(Text, nullable=True)
+    run_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=text("now()"),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=text("now()"),
+    )
@@ -0,0 +1,87 @@
+"""Per-run phase timing for the idea graph (search vs generation).
+
+Each run carries a RunTiming through graph state. The search and generate
+phases mark their start/end on it; when both phases have finished — in
+either order, since pipelined mode can start generating while stragglers
+are still searching — the run is added to a rolling window that
+/admin/metrics summarises, including how long the two phases overlapped.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+TIMING_WINDOW = 200  # runs kept for the rolling averages
+
+_MARKS = ("search_started", "context_ready", "search_finished", "generate_started", "generate_finished")
+
+
+class RunTiming:
+    """Monotonic timestamps for one graph run; reports itself once complete."""
+
+    def __init__(self, pipelined: bool = False):
+        self.pipelined = pipelined
+        self.marks: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, name: str) -> None:
+        if name not in _MARKS:
+            raise ValueError(f"Unknown timing mark {name!r}")
+        with self._lock:
+            self.marks.setdefault(name, time.monotonic())
+            complete = not self._reported and all(m in self.marks for m in _MARKS)
+            if complete:
+                self._reported = True
+        if complete:
+            _recorder.record(self.summary())
+
+    def summary(self) -> dict:
+        """Phase durations in seconds; overlap is search time spent after generation began."""
+        m = self.marks
+        start = m["search_started"]
+        return {
+            "pipelined": self.pipelined,
+            "search_s": m["search_finished"] - start,
+            "context_wait_s": m["context_ready"] - start,
+            "generate_s": m["generate_finished"] - m["generate_started"],
+            "overlap_s": max(0.0, min(m["search_finished"], m["generate_finished"]) - m["generate_started"]),
+            "total_s": m["generate_finished"] - start,  # what the caller waited
+        }
+
+
+class TimingRecorder:
+    """Rolling window of completed run summaries."""
+
+    def __init__(self, window: int = TIMING_WINDOW):
+        self._runs: deque[dict] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, summary: dict) -> None:
+        logger.info(
+            "graph run: search %.2fs, context after %.2fs, generate %.2fs, overlap %.2fs, total %.2fs",
+            summary["search_s"], summary["context_wait_s"], summary["generate_s"],
+            summary["overlap_s"], summary["total_s"],
+        )
+        with self._lock:
+            self._runs.append(summary)
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs = list(self._runs)
+        out = {}
+        for label, group in (("pipelined", [r for r in runs if r["pipelined"]]),
+                             ("sequential", [r for r in runs if not r["pipelined"]])):
+            if group:
+                out[label] = {"runs": len(group)} | {
+                    f"avg_{k}": round(sum(r[k] for r in group) / len(group), 3)
+                    for k in ("search_s", "context_wait_s", "generate_s", "overlap_s", "total_s")
+                }
+        return out
+
+
+_recorder = TimingRecorder()
+stats = _recorder.stats
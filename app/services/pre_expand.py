@@ -0,0 +1,154 @@
+"""Speculative background pre-expansion of freshly generated ideas.
+
+When PRE_EXPAND_ENABLED is set, every new run's ideas are queued for
+expansion on a small, dedicated pool right after the run is saved. Results
+go into `expanded_ideas` like any other expansion, so POST /expand (and
+/export) can serve them without an LLM call.
+
+Pre-expansion is low priority, and work is dropped rather than competing
+with user-facing calls:
+  - stale    : a task not started within PRE_EXPAND_MAX_AGE_S is dropped
+               (the user has likely moved on);
+  - busy     : a task is skipped if interactive OpenAI calls are queued at
+               the limiter when it would start;
+  - claimed  : when /expand asks for an idea whose task has not started, the
+               task is cancelled and the request expands it itself; if the
+               task is already running, the request waits for it (at most
+               PRE_EXPAND_CLAIM_WAIT_S) instead of paying for a second call;
+  - shutdown : queued tasks are cancelled.
+
+stats() reports scheduled/completed/used counts, so the share of
+pre-expansions that are actually served can be tuned against their cost.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.graph import expand_idea
+from app.services.limiter import limiter
+from app.services.run_service import save_expanded_idea
+
+logger = logging.getLogger(__name__)
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+PRE_EXPAND_ENABLED = os.getenv("PRE_EXPAND_ENABLED", "false").lower() == "true"
+PRE_EXPAND_CONCURRENCY = int(os.getenv("PRE_EXPAND_CONCURRENCY", "2"))    # background expansions in flight
+PRE_EXPAND_MAX_AGE_S = float(os.getenv("PRE_EXPAND_MAX_AGE_S", "120"))    # drop tasks queued longer
+PRE_EXPAND_CLAIM_WAIT_S = float(os.getenv("PRE_EXPAND_CLAIM_WAIT_S", "30"))  # /expand waits this long for a running task
+SPECULATIVE_KEYS_MAX = 10_000                                             # completed keys remembered for "used"
+
+
+class PreExpander:
+    """Schedules speculative expansions and tracks whether they get used."""
+
+    def __init__(self, *, workers: int = PRE_EXPAND_CONCURRENCY, max_age_s: float = PRE_EXPAND_MAX_AGE_S):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pre-expand")
+        self._max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._tasks: dict[tuple[str, int], Future] = {}
+        self._completed_keys: OrderedDict[tuple[str, int], None] = OrderedDict()
+        self._counts = dict.fromkeys(
+            ("scheduled", "completed", "used", "failed", "skipped_stale", "skipped_busy",
+             "cancelled_claimed", "cancelled_shutdown"),
+            0,
+        )
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def schedule(self, run_id: str, ideas: list[dict]) -> None:
+        """Queue an expansion for every non-empty idea of a new run."""
+        now = time.monotonic()
+        for pid, idea in enumerate(ideas, 1):
+            if not idea.get("name"):
+                continue
+            key = (run_id, pid)
+            idea = {k: v for k, v in idea.items() if k != "pid"}
+            future = self._executor.submit(self._expand, key, idea, now)
+            with self._lock:
+                self._tasks[key] = future
+                self._counts["scheduled"] += 1
+            future.add_done_callback(lambda _f, key=key: self._forget(key))
+
+    def _forget(self, key: tuple[str, int]) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+
+    def _expand(self, key: tuple[str, int], idea: dict, scheduled_at: float) -> list[str] | None:
+        if time.monotonic() - scheduled_at > self._max_age_s:
+            self._count("skipped_stale")
+            return None
+        if limiter("openai").stats()["queue_depth"] > 0:
+            self._count("skipped_busy")
+            return None
+        try:
+            plan = expand_idea(idea).get("extended_plan", [])
+            save_expanded_idea(run_id=key[0], pid=key[1], extended_plan=plan)
+        except Exception:
+            logger.exception("pre-expand: run %s pid %d failed", *key)
+            self._count("failed")
+            return None
+        with self._lock:
+            self._counts["completed"] += 1
+            self._completed_keys[key] = None
+            while len(self._completed_keys) > SPECULATIVE_KEYS_MAX:
+                self._completed_keys.popitem(last=False)
+        return plan
+
+    def claim(self, run_id: str, pid: int) -> Future | None:
+        """Hand an idea over to an on-demand /expand.
+
+        Returns the running task's future to wait on, or None if there is no
+        task (a queued one is cancelled so the caller expands it right away).
+        """
+        with self._lock:
+            future = self._tasks.get((run_id, pid))
+        if future is None:
+            return None
+        if future.cancel():
+            self._count("cancelled_claimed")
+            return None
+        return future
+
+    def note_served(self, run_id: str, pid: int) -> None:
+        """Record that a stored expansion was served; counts as used if it was speculative."""
+        key = (run_id, pid)
+        with self._lock:
+            if key in self._completed_keys:
+                del self._completed_keys[key]
+                self._counts["used"] += 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            futures = list(self._tasks.values())
+        for future in futures:
+            if future.cancel():
+                self._count("cancelled_shutdown")
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = len(self._tasks)
+        completed = counts["completed"]
+        return {
+            "enabled": PRE_EXPAND_ENABLED,
+            **counts,
+            "pending": in_flight,
+            "use_rate": round(counts["used"] / completed, 3) if completed else 0.0,
+        }
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+_expander = PreExpander()
+
+schedule = _expander.schedule
+claim = _expander.claim
+note_served = _expander.note_served
+shutdown = _expander.shutdown
+stats = _expander.stats
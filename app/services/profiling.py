@@ -0,0 +1,260 @@
+"""Opt-in sampling profiler for API requests and graph runs.
+
+A background thread samples the Python stacks of every thread in the
+process every PROFILE_INTERVAL_MS while at least one profile is active, and
+adds each stack to every active profile. Wall-clock samples show where a
+slow request waited as well as where it computed: in the OpenAI or Tavily
+HTTP clients, Pydantic validation, JSON encoding or SQLAlchemy. Idle pool
+workers and the idle event loop are skipped. Requests that overlap share
+samples, so a profile can include work from its neighbours.
+
+With PROFILE_SAMPLE_RATE > 0, ProfilingMiddleware profiles that fraction of
+requests. It returns the profile ID in an X-Profile-Id header and keeps the
+last PROFILE_KEEP profiles for GET /admin/profiles. With the rate at 0 the
+middleware is not installed at all. PROFILE_TRACEMALLOC adds the top
+allocation sites and peak traced memory, at a real cost while active.
+
+Profiles export as collapsed stacks ("frame;frame;frame count" per line),
+the input format of flamegraph.pl and speedscope.
+"""
+
+import itertools
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))     # fraction of requests; 0 = off
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))     # stack sampling period
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "false").lower() == "true"
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))                    # stored profiles (oldest dropped)
+MAX_STACK_DEPTH = 64
+TOP_ALLOCATIONS = 20
+
+# Innermost frames of a thread with nothing to do: (module, function).
+_IDLE_FRAMES = frozenset({
+    ("concurrent.futures.thread", "_worker"),
+    ("queue", "get"),
+    ("selectors", "select"),
+})
+_THREAD_NUMBER_RE = re.compile(r"[-_]\d+(?: \(.*\))?$")
+
+
+class Profile:
+    """Samples (and optionally allocations) collected for one request or run."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, label: str):
+        self.id = next(self._ids)
+        self.label = label
+        self.created_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.stacks: Counter[str] = Counter()
+        self.allocations: list[str] = []
+        self.peak_memory_kb: float | None = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text for flame graphs, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 20) -> dict:
+        """Hottest frames by self samples (innermost) and total samples (anywhere on the stack)."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]  # drop the thread-name root
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return {
+            **self.meta(),
+            "self": own.most_common(top),
+            "total": total.most_common(top),
+            "allocations": self.allocations,
+            "peak_memory_kb": self.peak_memory_kb,
+        }
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 1),
+            "samples": self.samples,
+        }
+
+
+# ── sampler ───────────────────────────────────────────────────────────────────
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    """True if the innermost frame or its caller is a known wait-for-work frame."""
+    for f in (frame, frame.f_back):
+        if f is not None and (f.f_globals.get("__name__"), f.f_code.co_name) in _IDLE_FRAMES:
+            return True
+    return False
+
+
+def _collapse(frame, thread_name: str) -> str | None:
+    """Root-first "thread;module:function;..." for one thread, or None if it is idle."""
+    if _is_idle(frame):
+        return None
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(_THREAD_NUMBER_RE.sub("", thread_name))
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples all threads while any profile is active; feeds every active profile."""
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_MS / 1000):
+        self._interval_s = interval_s
+        self._lock = threading.Lock()
+        self._active: set[Profile] = set()
+        self._thread: threading.Thread | None = None
+        self._tracemalloc_users = 0
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            time.sleep(self._interval_s)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                stack
+                for ident, frame in sys._current_frames().items()
+                if ident != me and (stack := _collapse(frame, names.get(ident, "thread"))) is not None
+            ]
+            # Only profiles still active: once remove() returns, a profile's
+            # stacks are never written again, so readers need no lock.
+            with self._lock:
+                for profile in self._active:
+                    profile.stacks.update(stacks)
+
+    # tracemalloc is process-wide: keep it on while any profile needs it.
+    def start_tracemalloc(self) -> None:
+        with self._lock:
+            self._tracemalloc_users += 1
+            if self._tracemalloc_users == 1 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def stop_tracemalloc(self, profile: Profile) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        profile.peak_memory_kb = round(peak / 1024, 1)
+        profile.allocations = [str(s) for s in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]
+        with self._lock:
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0:
+                tracemalloc.stop()
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+_sampler = StackSampler()
+_store: OrderedDict[int, Profile] = OrderedDict()
+_store_lock = threading.Lock()
+_counts = {"profiled": 0}
+
+
+@contextmanager
+def profile(label: str, *, trace_memory: bool = PROFILE_TRACEMALLOC, keep: bool = True):
+    """Profile the enclosed block; yields the Profile (stored for /admin/profiles if *keep*)."""
+    prof = Profile(label)
+    if trace_memory:
+        _sampler.start_tracemalloc()
+    _sampler.add(prof)
+    start = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.duration_ms = (time.perf_counter() - start) * 1000
+        _sampler.remove(prof)
+        if trace_memory:
+            _sampler.stop_tracemalloc(prof)
+        if keep:
+            with _store_lock:
+                _store[prof.id] = prof
+                _counts["profiled"] += 1
+                while len(_store) > PROFILE_KEEP:
+                    _store.popitem(last=False)
+
+
+def get(profile_id: int) -> Profile | None:
+    with _store_lock:
+        return _store.get(profile_id)
+
+
+def list_profiles() -> list[dict]:
+    """Stored profiles, newest first."""
+    with _store_lock:
+        profiles = list(_store.values())
+    return [p.meta() for p in reversed(profiles)]
+
+
+def stats() -> dict:
+    with _store_lock:
+        return {
+            "sample_rate": PROFILE_SAMPLE_RATE,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "tracemalloc": PROFILE_TRACEMALLOC,
+            "profiled": _counts["profiled"],
+            "stored": len(_store),
+        }
+
+
+# ── ASGI middleware ───────────────────────────────────────────────────────────
+
+class ProfilingMiddleware:
+    """Profiles a random PROFILE_SAMPLE_RATE share of requests (never /admin)."""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self._sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or random.random() >= self._sample_rate
+                or scope["path"].startswith("/admin")):
+            await self.app(scope, receive, send)
+            return
+
+        with profile(f"{scope['method']} {scope['path']}") as prof:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    headers = [*message.get("headers", []), (b"x-profile-id", str(prof.id).encode())]
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
@@ -0,0 +1,71 @@
+"""Optional recording of incoming requests as a JSONL trace.
+
+With REQUEST_TRACE_PATH set, every HTTP request (except /admin/*) is
+appended to that file as one JSON line:
+
+    {"t": 12.031, "method": "POST", "path": "/expand", "query": "", "body": {"run_id": "...", "pid": 2}}
+
+"t" is seconds since the first traced request, so the file preserves both
+the request mix and the arrival pattern. scripts/load_test.py --trace
+replays it against a stubbed copy of the app.
+"""
+
+import json
+import os
+import threading
+import time
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+REQUEST_TRACE_PATH = os.getenv("REQUEST_TRACE_PATH", "")   # empty = tracing off
+MAX_BODY_BYTES = 16 * 1024                                 # larger bodies are recorded as null
+
+
+class RequestTraceMiddleware:
+    """Pure ASGI middleware: records each request once its response has been sent."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start: float | None = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin"):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        chunks: list[bytes] = []
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        try:
+            await self.app(scope, recording_receive, send)
+        finally:
+            self._write({
+                "t": round(now - self._start, 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "body": _decode_body(b"".join(chunks)),
+            })
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+
+def _decode_body(raw: bytes):
+    if not raw or len(raw) > MAX_BODY_BYTES:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
@@ -0,0 +1,93 @@
+"""In-process read-through cache for run payloads.
+
+A run is effectively immutable once saved, but a single session reads it
+many times (/expand and /export per idea, /runs/{id} on every History
+rerun). run_service consults this cache before going to the database and
+populates it on save and on every miss.
+
+The cache is a bounded LRU with an optional TTL. Values are the dicts
+returned by run_service.get_run(); get() hands back a shallow copy so
+callers may add or drop top-level keys, but nested ideas are shared and
+must not be mutated in place.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+MAX_ENTRIES = int(os.getenv("RUN_CACHE_SIZE", "256"))  # 0 disables the cache
+TTL_S = float(os.getenv("RUN_CACHE_TTL_S", "0"))        # 0 = no expiry
+
+
+class RunCache:
+    """Thread-safe LRU keyed by run_id, with hit/miss/eviction counters."""
+
+    def __init__(self, *, max_entries: int = MAX_ENTRIES, ttl_s: float = TTL_S):
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, run_id: str) -> dict | None:
+        with self._lock:
+            entry = self._data.get(run_id)
+            if entry is not None and self._ttl_s and time.monotonic() - entry[0] > self._ttl_s:
+                del self._data[run_id]
+                self._evictions += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(run_id)
+            self._hits += 1
+            return dict(entry[1])
+
+    def put(self, run_id: str, run: dict) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._data[run_id] = (time.monotonic(), run)
+            self._data.move_to_end(run_id)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, run_id: str) -> None:
+        """Drop run_id so the next read goes to the database."""
+        with self._lock:
+            if self._data.pop(run_id, None) is not None:
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for /admin/metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+_cache = RunCache()
+
+get = _cache.get
+put = _cache.put
+invalidate = _cache.invalidate
+clear = _cache.clear
+stats = _cache.stats
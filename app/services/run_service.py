@@ -2,18 +2,134 @@
 
 Handles saving idea-generation runs and expanded ideas to PostgreSQL,
 and retrieving run history for the history page.
+
+Every function has an ``*_async`` twin that runs on the asyncpg engine, so
+async request handlers can await DB I/O without holding a threadpool slot.
+
+IDs and created_at are assigned here rather than by the database, so that
+with WRITE_BEHIND_ENABLED the run_id can be returned before the row is
+committed (see services/write_behind.py).
+
+Run reads go through services/run_cache.py first; saved runs are written
+into the cache immediately, so the /expand and /export calls that follow
+a /ideas response never hit the database for the run payload. Anything
+that changes a stored run must call run_cache.invalidate(run_id).
 """
 
 import uuid
-from datetime import datetime
+from collections.abc import Iterator
+from datetime import datetime, timezone
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.services.db import get_session
+from app.services.db import get_async_session, get_session
+from app.services import run_cache, write_behind
 from app.services.models import ANONYMOUS_USER_ID, ExpandedIdea, Run
 
 
+# ── row <-> dict helpers (shared by the sync and async variants) ─────────────
+
+def _run_summary(r: Run) -> dict:
+    """History-list view of a run (no ideas blob)."""
+    return {
+        "run_id": str(r.id),
+        "tech_stack": r.tech_stack,
+        "domain": r.domain,
+        "level": r.level,
+        "count": r.count,
+        "created_at": r.created_at.isoformat(),
+    }
+
+
+def _run_detail(run: Run) -> dict:
+    """Full view of a run, including ideas and web context."""
+    return {
+        "run_id": str(run.id),
+        "user_id": str(run.user_id),
+        "tech_stack": run.tech_stack,
+        "domain": run.domain,
+        "level": run.level,
+        "count": run.count,
+        "enable_multi_query": run.enable_multi_query,
+        "ideas": run.ideas,
+        "web_context": run.web_context,
+        "created_at": run.created_at.isoformat(),
+    }
+
+
+def _row_detail(row: dict) -> dict:
+    """Full view of a run built from its column values (before it is read back)."""
+    return {
+        "run_id": str(row["id"]),
+        "user_id": str(row["user_id"]),
+        "tech_stack": row["tech_stack"],
+        "domain": row["domain"],
+        "level": row["level"],
+        "count": row["count"],
+        "enable_multi_query": row["enable_multi_query"],
+        "ideas": row["ideas"],
+        "web_context": row["web_context"],
+        "created_at": row["created_at"].isoformat(),
+    }
+
+
+def _new_run_row(
+    *,
+    tech_stack: str,
+    domain: str | None,
+    level: str | None,
+    count: int,
+    enable_multi_query: bool,
+    ideas: list[dict],
+    web_context: str | None,
+    user_id: uuid.UUID,
+) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "tech_stack": tech_stack,
+        "domain": domain,
+        "level": level,
+        "count": count,
+        "enable_multi_query": enable_multi_query,
+        "ideas": ideas,
+        "web_context": web_context,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _new_expanded_row(*, run_id: str, pid: int, extended_plan: list[str]) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "run_id": uuid.UUID(run_id),
+        "pid": pid,
+        "extended_plan": extended_plan,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _latest_expansion_stmt(run_id: str, pid: int):
+    return (
+        select(ExpandedIdea.extended_plan)
+        .where(ExpandedIdea.run_id == uuid.UUID(run_id), ExpandedIdea.pid == pid)
+        .order_by(ExpandedIdea.created_at.desc())
+        .limit(1)
+    )
+
+
+def _history_stmt(user_id: uuid.UUID, limit: int, offset: int):
+    return (
+        select(Run)
+        .where(Run.user_id == user_id)
+        .order_by(Run.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+# ── sync API ───────────────────────────────────────────────────────────────────
+
 def save_run(
     *,
     tech_stack: str,
@@ -38,10 +154,10 @@ def save_run(
         user_id: Owner of this run. Defaults to anonymous until auth is added.
 
     Returns:
-        The UUID of the newly created run, as a string.
+        The UUID of the newly created run, as a string. With write-behind
+        enabled the row may not be committed yet when this returns.
     """
-    run = Run(
-        user_id=user_id,
+    row = _new_run_row(
         tech_stack=tech_stack,
         domain=domain,
         level=level,
@@ -49,12 +165,15 @@ def save_run(
         enable_multi_query=enable_multi_query,
         ideas=ideas,
         web_context=web_context,
+        user_id=user_id,
     )
-    with get_session() as session:
-        session.add(run)
-        session.flush()  # populate run.id before commit
-        run_id = str(run.id)
-    return run_id
+    if write_behind.ENABLED:
+        write_behind.submit_run(row)
+    else:
+        with get_session() as session:
+            session.add(Run(**row))
+    run_cache.put(str(row["id"]), _row_detail(row))
+    return str(row["id"])
 
 
 def save_expanded_idea(
@@ -73,16 +192,21 @@ def save_expanded_idea(
     Returns:
         The UUID of the newly created expanded_idea row, as a string.
     """
-    expanded = ExpandedIdea(
-        run_id=uuid.UUID(run_id),
-        pid=pid,
-        extended_plan=extended_plan,
-    )
+    row = _new_expanded_row(run_id=run_id, pid=pid, extended_plan=extended_plan)
+    if write_behind.ENABLED:
+        write_behind.submit_expanded(row)
+    else:
+        with get_session() as session:
+            session.add(ExpandedIdea(**row))
+    return str(row["id"])
+
+
+def get_latest_expansion(*, run_id: str, pid: int) -> list[str] | None:
+    """Return the most recent stored extended_plan for an idea, or None if never expanded."""
+    if pending := write_behind.pending_expanded(run_id, pid):
+        return list(pending["extended_plan"])
     with get_session() as session:
-        session.add(expanded)
-        session.flush()
-        expanded_id = str(expanded.id)
-    return expanded_id
+        return session.execute(_latest_expansion_stmt(run_id, pid)).scalar_one_or_none()
 
 
 def load_history(
@@ -97,25 +221,121 @@ def load_history(
     call get_run() for the full payload).
     """
     with get_session() as session:
-        stmt = (
-            select(Run)
-            .where(Run.user_id == user_id)
-            .order_by(Run.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-        )
-        runs = session.execute(stmt).scalars().all()
-        return [
-            {
-                "run_id": str(r.id),
-                "tech_stack": r.tech_stack,
-                "domain": r.domain,
-                "level": r.level,
-                "count": r.count,
-                "created_at": r.created_at.isoformat(),
-            }
-            for r in runs
-        ]
+        runs = session.execute(_history_stmt(user_id, limit, offset)).scalars().all()
+        return [_run_summary(r) for r in runs]
+
+
+EXPORT_CHUNK_SIZE = 200  # runs fetched per round-trip when streaming exports
+
+
+def _chunk_expansions(session: Session, chunk) -> list:
+    """All expanded_ideas rows for a chunk of run rows, oldest first."""
+    stmt = (
+        select(ExpandedIdea.id, ExpandedIdea.run_id, ExpandedIdea.pid,
+               ExpandedIdea.extended_plan, ExpandedIdea.created_at)
+        .where(ExpandedIdea.run_id.in_([row.id for row in chunk]))
+        .order_by(ExpandedIdea.created_at)
+    )
+    return session.execute(stmt).all()
+
+
+def iter_runs_for_export(
+    *,
+    user_id: uuid.UUID = ANONYMOUS_USER_ID,
+    run_ids: list[str] | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> Iterator[dict]:
+    """Stream runs (most recent first) with their latest stored expansions.
+
+    Rows come from a server-side cursor in chunks of EXPORT_CHUNK_SIZE, and
+    expansions are loaded per chunk, so memory stays flat however many runs
+    are exported. web_context is not loaded. Each yielded dict has run_id,
+    tech_stack, domain, level, created_at, ideas and expansions
+    ({pid: extended_plan}, only for ideas that were expanded).
+    """
+    if write_behind.ENABLED:
+        write_behind.flush(timeout=5)
+    stmt = (
+        select(Run.id, Run.tech_stack, Run.domain, Run.level, Run.created_at, Run.ideas)
+        .where(Run.user_id == user_id)
+        .order_by(Run.created_at.desc())
+        .offset(offset)
+    )
+    if run_ids is not None:
+        stmt = stmt.where(Run.id.in_([uuid.UUID(r) for r in run_ids]))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    with get_session() as session:
+        result = session.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for chunk in result.partitions():
+            plans: dict[uuid.UUID, dict[int, list[str]]] = {}
+            # Oldest first, so the latest expansion of each (run, pid) wins.
+            for e in _chunk_expansions(session, chunk):
+                plans.setdefault(e.run_id, {})[e.pid] = e.extended_plan
+            for row in chunk:
+                yield {
+                    "run_id": str(row.id),
+                    "tech_stack": row.tech_stack,
+                    "domain": row.domain,
+                    "level": row.level,
+                    "created_at": row.created_at.isoformat(),
+                    "ideas": row.ideas,
+                    "expansions": plans.get(row.id, {}),
+                }
+
+
+def iter_runs_for_analytics(
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    tech_stack: str | None = None,
+    user_id: uuid.UUID | None = None,
+    include_web_context: bool = False,
+) -> Iterator[dict]:
+    """Stream every run matching the filters, oldest first, with all its expansions.
+
+    For warehouse loads: no page cap and no OFFSET; rows come from a
+    server-side cursor in chunks of EXPORT_CHUNK_SIZE, so memory stays flat
+    regardless of table size. since is inclusive, until exclusive;
+    tech_stack is a case-insensitive substring match; user_id=None means
+    all users.
+    """
+    if write_behind.ENABLED:
+        write_behind.flush(timeout=5)
+    columns = [Run.id, Run.user_id, Run.tech_stack, Run.domain, Run.level, Run.count,
+               Run.enable_multi_query, Run.ideas, Run.created_at]
+    if include_web_context:
+        columns.append(Run.web_context)
+    stmt = select(*columns).order_by(Run.created_at, Run.id)
+    if since is not None:
+        stmt = stmt.where(Run.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Run.created_at < until)
+    if tech_stack:
+        # Escape LIKE wildcards so "%" and "_" in the filter match literally.
+        literal = tech_stack.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(Run.tech_stack.ilike(f"%{literal}%", escape="\\"))
+    if user_id is not None:
+        stmt = stmt.where(Run.user_id == user_id)
+
+    with get_session() as session:
+        result = session.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for chunk in result.partitions():
+            expansions: dict[uuid.UUID, list[dict]] = {}
+            for e in _chunk_expansions(session, chunk):
+                expansions.setdefault(e.run_id, []).append({
+                    "expanded_idea_id": e.id,
+                    "pid": e.pid,
+                    "extended_plan": e.extended_plan,
+                    "created_at": e.created_at,
+                })
+            for row in chunk:
+                record = row._asdict()
+                record["run_id"] = record.pop("id")
+                record["expanded_ideas"] = expansions.get(row.id, [])
+                yield record
 
 
 def get_run(*, run_id: str) -> dict | None:
@@ -123,19 +343,99 @@ def get_run(*, run_id: str) -> dict | None:
 
     Returns None if the run does not exist.
     """
+    if cached := run_cache.get(run_id):
+        return cached
+    if pending := write_behind.pending_run(run_id):
+        return _row_detail(pending)
     with get_session() as session:
         run = session.get(Run, uuid.UUID(run_id))
         if run is None:
             return None
-        return {
-            "run_id": str(run.id),
-            "user_id": str(run.user_id),
-            "tech_stack": run.tech_stack,
-            "domain": run.domain,
-            "level": run.level,
-            "count": run.count,
-            "enable_multi_query": run.enable_multi_query,
-            "ideas": run.ideas,
-            "web_context": run.web_context,
-            "created_at": run.created_at.isoformat(),
-        }
+        detail = _run_detail(run)
+    run_cache.put(run_id, detail)
+    return dict(detail)
+
+
+# ── async API ──────────────────────────────────────────────────────────────────
+
+async def save_run_async(
+    *,
+    tech_stack: str,
+    domain: str | None,
+    level: str | None,
+    count: int,
+    enable_multi_query: bool,
+    ideas: list[dict],
+    web_context: str | None,
+    user_id: uuid.UUID = ANONYMOUS_USER_ID,
+) -> str:
+    """Async variant of save_run()."""
+    row = _new_run_row(
+        tech_stack=tech_stack,
+        domain=domain,
+        level=level,
+        count=count,
+        enable_multi_query=enable_multi_query,
+        ideas=ideas,
+        web_context=web_context,
+        user_id=user_id,
+    )
+    if write_behind.ENABLED:
+        write_behind.submit_run(row)
+    else:
+        async with get_async_session() as session:
+            session.add(Run(**row))
+    run_cache.put(str(row["id"]), _row_detail(row))
+    return str(row["id"])
+
+
+async def save_expanded_idea_async(
+    *,
+    run_id: str,
+    pid: int,
+    extended_plan: list[str],
+) -> str:
+    """Async variant of save_expanded_idea()."""
+    row = _new_expanded_row(run_id=run_id, pid=pid, extended_plan=extended_plan)
+    if write_behind.ENABLED:
+        write_behind.submit_expanded(row)
+    else:
+        async with get_async_session() as session:
+            session.add(ExpandedIdea(**row))
+    return str(row["id"])
+
+
+async def get_latest_expansion_async(*, run_id: str, pid: int) -> list[str] | None:
+    """Async variant of get_latest_expansion()."""
+    if pending := write_behind.pending_expanded(run_id, pid):
+        return list(pending["extended_plan"])
+    async with get_async_session() as session:
+        result = await session.execute(_latest_expansion_stmt(run_id, pid))
+        return result.scalar_one_or_none()
+
+
+async def load_history_async(
+    *,
+    user_id: uuid.UUID = ANONYMOUS_USER_ID,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[dict]:
+    """Async variant of load_history()."""
+    async with get_async_session() as session:
+        result = await session.execute(_history_stmt(user_id, limit, offset))
+        return [_run_summary(r) for r in result.scalars().all()]
+
+
+async def get_run_async(*, run_id: str) -> dict | None:
+    """Async variant of get_run()."""
+    if cached := run_cache.get(run_id):
+        return cached
+    if pending := write_behind.pending_run(run_id):
+        return _row_detail(pending)
+    async with get_async_session() as session:
+        run = await session.get(Run, uuid.UUID(run_id))
+        if run is None:
+            return None
+        detail = _run_detail(run)
+    run_cache.put(run_id, detail)
+    return dict(detail)
@@ -0,0 +1,321 @@
+"""Write-behind persistence queue.
+
+When WRITE_BEHIND_ENABLED is set, run_service hands new rows to this queue
+instead of inserting them on the request path. A single background thread
+drains the queue and writes each batch with one multi-row INSERT per table,
+so /ideas and /expand respond before their rows are committed.
+
+Read-your-writes is preserved through the pending map: rows stay visible via
+pending_run() until the batch that contains them has committed. The map is
+per process, so this only holds within one worker (see ENABLED below).
+
+When the database is unavailable (connection loss, OperationalError) the
+batch stays with the writer and is retried whole, with exponential back-off
+capped at WRITE_BEHIND_MAX_RETRY_DELAY_S, until the database is back; later
+rows wait in the queue. Any other error means a bad row: the batch is
+written one row at a time, and rows that still fail are logged and appended
+to the dead-letter file instead of blocking every later write. A
+dead-lettered run is evicted from run_cache.
+
+Exposes:
+  - ENABLED          : whether run_service should route writes through the queue
+  - submit_run()     : enqueue a `runs` row (dict of column values)
+  - submit_expanded(): enqueue an `expanded_ideas` row
+  - pending_run()    : look up a run that is queued but not yet committed
+  - pending_expanded(): latest queued expansion for (run_id, pid), if any
+  - flush()          : block until everything queued so far is committed (or dead-lettered)
+  - shutdown()       : flush and stop the writer (called on API shutdown)
+  - stats()          : queue depth and lag for /admin/metrics
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import orjson
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+
+from app.services import run_cache
+from app.services.db import get_session
+from app.services.models import ExpandedIdea, Run
+
+logger = logging.getLogger(__name__)
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+# Read-your-writes covers only this process: with several uvicorn workers, a
+# request served by another worker can get 404 for a run that is still queued
+# here. Run a single worker (or sticky routing) when enabling write-behind.
+ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))         # rows per flush
+MAX_WAIT_S = float(os.getenv("WRITE_BEHIND_MAX_WAIT_MS", "200")) / 1000  # max time a row waits for a batch
+RETRY_DELAY_S = 1.0                                                 # first back-off after a transient failure
+MAX_RETRY_DELAY_S = float(os.getenv("WRITE_BEHIND_MAX_RETRY_DELAY_S", "30"))  # back-off cap
+DEAD_LETTER_PATH = os.getenv(
+    "WRITE_BEHIND_DEAD_LETTER_PATH",
+    str(Path(__file__).resolve().parent.parent.parent / ".cache" / "write_behind_dead_letter.jsonl"),
+)
+
+# Sentinel placed on the queue to wake the writer for flush/shutdown.
+_FLUSH = object()
+
+
+class WriteBehindQueue:
+    """Single-writer queue that batches inserts into `runs` and `expanded_ideas`."""
+
+    def __init__(self, *, batch_size: int = BATCH_SIZE, max_wait_s: float = MAX_WAIT_S):
+        self._batch_size = batch_size
+        self._max_wait_s = max_wait_s
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_runs: dict[str, dict] = {}   # run_id -> row, until committed
+        self._pending_expanded: dict[tuple[str, int], dict] = {}  # (run_id, pid) -> latest row
+        self._enqueued_at: dict[int, float] = {}   # id(row) -> monotonic enqueue time
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._flushed = threading.Condition(self._lock)
+        self._submitted = 0
+        self._committed = 0
+        self._batches = 0
+        self._failures = 0
+        self._dead_lettered = 0
+        self._dropped_runs: set[str] = set()  # dead-lettered run IDs
+        self._last_commit_lag_s = 0.0
+
+    # ── producer side ───────────────────────────────────────────────────────
+
+    def submit_run(self, row: dict) -> None:
+        """Queue a `runs` row. row["id"] must already be set (client-side UUID)."""
+        with self._lock:
+            self._pending_runs[str(row["id"])] = row
+        self._put(Run, row)
+
+    def submit_expanded(self, row: dict) -> None:
+        """Queue an `expanded_ideas` row. row["id"] must already be set."""
+        with self._lock:
+            self._pending_expanded[(str(row["run_id"]), row["pid"])] = row
+        self._put(ExpandedIdea, row)
+
+    def pending_run(self, run_id: str) -> dict | None:
+        """Return the queued row for run_id if it has not been committed yet."""
+        with self._lock:
+            return self._pending_runs.get(run_id)
+
+    def pending_expanded(self, run_id: str, pid: int) -> dict | None:
+        """Return the newest queued expansion for (run_id, pid) if not committed yet."""
+        with self._lock:
+            return self._pending_expanded.get((run_id, pid))
+
+    def _put(self, model, row: dict) -> None:
+        self._ensure_started()
+        with self._lock:
+            self._enqueued_at[id(row)] = time.monotonic()
+            self._submitted += 1
+        self._queue.put((model, row))
+
+    # ── lifecycle ───────────────────────────────────────────────────────────
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True,
+                )
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every row submitted so far is committed.
+
+        Returns False if the timeout elapsed first.
+        """
+        if self._thread is None:
+            return True
+        with self._lock:
+            target = self._submitted
+        self._queue.put((_FLUSH, None))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._flushed:
+            while self._committed < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float | None = 30.0) -> None:
+        """Flush everything queued, then stop the writer thread."""
+        if self._thread is None or self._stopping:
+            return
+        if not self.flush(timeout):
+            logger.error("write-behind: shutdown flush timed out, %d rows not committed",
+                         self._queue.qsize())
+        self._stopping = True
+        self._queue.put((_FLUSH, None))
+        self._thread.join(timeout)
+
+    # ── writer side ─────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while not self._stopping:
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> list[tuple]:
+        """Gather up to batch_size rows, waiting at most max_wait_s after the first."""
+        model, row = self._queue.get()
+        if model is _FLUSH:
+            return []
+        batch = [(model, row)]
+        deadline = time.monotonic() + self._max_wait_s
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                model, row = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if model is _FLUSH:
+                break
+            batch.append((model, row))
+        return batch
+
+    def _insert(self, runs: list[dict], expanded: list[dict]) -> None:
+        with get_session() as session:
+            # Runs go first so expansions in the same batch satisfy the FK.
+            if runs:
+                session.execute(insert(Run).values(runs))
+            if expanded:
+                session.execute(insert(ExpandedIdea).values(expanded))
+
+    def _insert_until_up(self, runs: list[dict], expanded: list[dict]) -> None:
+        """Insert, retrying transient errors with capped exponential back-off until the DB is back.
+
+        Non-transient errors (integrity, data) are raised to the caller.
+        """
+        delay = RETRY_DELAY_S
+        while True:
+            try:
+                self._insert(runs, expanded)
+                return
+            except Exception as exc:
+                if not _is_transient(exc):
+                    raise
+                with self._lock:
+                    self._failures += 1
+                logger.warning("write-behind: database unavailable (%s); retrying %d rows in %.1fs",
+                               exc, len(runs) + len(expanded), delay)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_S)
+
+    def _write(self, batch: list[tuple]) -> None:
+        runs = [row for model, row in batch if model is Run]
+        expanded = [row for model, row in batch if model is ExpandedIdea]
+        with self._lock:
+            dropped = [row for row in expanded if str(row["run_id"]) in self._dropped_runs]
+        if dropped:
+            expanded = [row for row in expanded if not any(row is d for d in dropped)]
+            for row in dropped:
+                self._dead_letter(ExpandedIdea, row, "parent run was dead-lettered")
+        try:
+            if runs or expanded:
+                self._insert_until_up(runs, expanded)
+        except Exception as exc:
+            # A bad row (integrity/data error) fails the whole batch: isolate
+            # it by writing one row at a time, runs first.
+            with self._lock:
+                self._failures += 1
+            logger.error("write-behind: batch of %d rows failed (%s); writing rows one by one", len(batch), exc)
+            for row in runs:
+                self._write_one(Run, row)
+            for row in expanded:
+                self._write_one(ExpandedIdea, row)
+
+        now = time.monotonic()
+        with self._lock:
+            oldest = min(self._enqueued_at.pop(id(row), now) for _, row in batch)
+            self._last_commit_lag_s = now - oldest
+            for row in runs:
+                self._pending_runs.pop(str(row["id"]), None)
+            for row in expanded + dropped:
+                key = (str(row["run_id"]), row["pid"])
+                if self._pending_expanded.get(key) is row:
+                    del self._pending_expanded[key]
+            self._committed += len(batch)
+            self._batches += 1
+            self._flushed.notify_all()
+
+    def _write_one(self, model, row: dict) -> None:
+        try:
+            self._insert_until_up([row], []) if model is Run else self._insert_until_up([], [row])
+        except Exception as exc:
+            self._dead_letter(model, row, f"{type(exc).__name__}: {exc}")
+
+    def _dead_letter(self, model, row: dict, error: str) -> None:
+        """Log a row that cannot be written and append it to the dead-letter file.
+
+        A dead-lettered run is also evicted from run_cache, so /runs/{id},
+        /expand and /export stop serving it, and its queued expansions
+        follow it into the dead-letter file.
+        """
+        logger.error("write-behind: dropping %s row %s: %s", model.__tablename__, row.get("id"), error)
+        if model is Run:
+            run_cache.invalidate(str(row["id"]))
+            with self._lock:
+                self._dropped_runs.add(str(row["id"]))
+        record = {"table": model.__tablename__, "error": error, "row": row}
+        try:
+            Path(DEAD_LETTER_PATH).parent.mkdir(parents=True, exist_ok=True)
+            with open(DEAD_LETTER_PATH, "ab") as f:
+                f.write(orjson.dumps(record, default=str) + b"\n")
+        except OSError:
+            logger.exception("write-behind: could not write dead-letter file %s", DEAD_LETTER_PATH)
+        with self._lock:
+            self._dead_lettered += 1
+
+    # ── metrics ─────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """Queue depth and lag, for /admin/metrics."""
+        now = time.monotonic()
+        with self._lock:
+            oldest = min(self._enqueued_at.values(), default=None)
+            return {
+                "enabled": ENABLED,
+                "queue_depth": self._submitted - self._committed,
+                "pending_runs": len(self._pending_runs),
+                "oldest_pending_age_s": round(now - oldest, 3) if oldest is not None else 0.0,
+                "last_commit_lag_s": round(self._last_commit_lag_s, 3),
+                "submitted": self._submitted,
+                "committed": self._committed,
+                "batches": self._batches,
+                "failed_batches": self._failures,
+                "dead_lettered": self._dead_lettered,
+            }
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Errors worth retrying as-is: lost or refused connections, server-side operational errors."""
+    if isinstance(exc, (OperationalError, InterfaceError, DisconnectionError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+# ── module-level singleton ────────────────────────────────────────────────────
+_queue = WriteBehindQueue()
+
+submit_run = _queue.submit_run
+submit_expanded = _queue.submit_expanded
+pending_run = _queue.pending_run
+pending_expanded = _queue.pending_expanded
+flush = _queue.flush
+shutdown = _queue.shutdown
+stats = _queue.stats
@@ -1,26 +1,51 @@
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
 from langchain_core.tools import tool
 from tavily import TavilyClient
 
+from app.services import cassette, clients
+from app.services.limiter import limiter
+
 # ── tuneable constants ────────────────────────────────────────────────────────
 MAX_RESULTS = 5
 MAX_CHARS_SINGLE = 3_000
 MAX_CHARS_MULTI = 6_000
 
+# Pipelined multi-query searches (start_multi_search, used by graph.py with
+# PIPELINE_ENABLED) run concurrently on this pool; the tool runs them in turn.
+_search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_THREADS", "8")), thread_name_prefix="tavily",
+)
+
 
 # ── internal helpers ──────────────────────────────────────────────────────────
 
-def _get_client() -> TavilyClient:
-    """Return a TavilyClient, raising early if the API key is missing."""
+clients.register("tavily", lambda api_key: TavilyClient(api_key=api_key))
+
+
+def _api_key() -> str:
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         raise ValueError("TAVILY_API_KEY is not set in the environment")
-    return TavilyClient(api_key=api_key)
+    return api_key
+
+
+@contextmanager
+def _get_client():
+    """Lease the shared TavilyClient for one search (cassette-wrapped under CASSETTE_MODE).
+
+    Raises ValueError if TAVILY_API_KEY is missing (not needed in replay mode).
+    """
+    with ExitStack() as stack:
+        yield cassette.wrap_tavily(lambda: stack.enter_context(clients.lease("tavily", _api_key())))
 
 
-def _search_single_query(client: TavilyClient, query: str, char_budget: int) -> str:
+def _search_single_query(query: str, char_budget: int) -> str:
     """Run one Tavily search and return a snippet string within *char_budget* chars."""
-    results = client.search(query=query, max_results=MAX_RESULTS).get("results", [])
+    with _get_client() as client, limiter("tavily").acquire():
+        results = client.search(query=query, max_results=MAX_RESULTS).get("results", [])
     parts: list[str] = []
     used = 0
     for r in results:
@@ -35,6 +60,31 @@ def _search_single_query(client: TavilyClient, query: str, char_budget: int) ->
     return "\n\n".join(parts)
 
 
+def _multi_queries(tech_stack: str, domain: str | None) -> list[str]:
+    """Complementary queries for multi-query mode; the primary query comes first."""
+    queries = [
+        f"project ideas for {tech_stack}",
+        f"{tech_stack} tutorials",
+        f"{tech_stack} example projects",
+    ]
+    if domain:
+        queries.append(f"{tech_stack} {domain} projects")
+    return queries
+
+
+def start_multi_search(tech_stack: str, domain: str | None = None) -> list[Future]:
+    """Submit every multi-query search at once; returns futures (→ snippet str) in query order."""
+    queries = _multi_queries(tech_stack, domain)
+    char_budget = MAX_CHARS_MULTI // len(queries)
+    return [_search_executor.submit(_search_single_query, q, char_budget) for q in queries]
+
+
+def merge_snippets(snippets: list[str]) -> str:
+    """Join per-query snippets (empty ones skipped) within MAX_CHARS_MULTI."""
+    merged = "\n\n---\n\n".join(s for s in snippets if s)
+    return merged[:MAX_CHARS_MULTI]  # hard cap in case of rounding
+
+
 # ── LangChain tool ────────────────────────────────────────────────────────────
 
 @tool
@@ -55,26 +105,12 @@ def web_search_project_ideas(
     Returns:
         Concatenated search-result snippets as a single string.
     """
-    client = _get_client()
-
     if not enable_multi_query:
         query = f"project ideas and tutorials for {tech_stack}"
-        return _search_single_query(client, query, MAX_CHARS_SINGLE)
-
-    queries = [
-        f"project ideas for {tech_stack}",
-        f"{tech_stack} tutorials",
-        f"{tech_stack} example projects",
-    ]
-    if domain:
-        queries.append(f"{tech_stack} {domain} projects")
+        return _search_single_query(query, MAX_CHARS_SINGLE)
 
+    # One query after another, as before pipelining: concurrent fan-out (and
+    # its burst of Tavily calls) is opt-in through PIPELINE_ENABLED.
+    queries = _multi_queries(tech_stack, domain)
     char_budget = MAX_CHARS_MULTI // len(queries)
-    snippets = [
-        result
-        for q in queries
-        if (result := _search_single_query(client, q, char_budget))
-    ]
-
-    merged = "\n\n---\n\n".join(snippets)
-    return merged[:MAX_CHARS_MULTI]  # hard cap in case of rounding
+    return merge_snippets([_search_single_query(q, char_budget) for q in queries])
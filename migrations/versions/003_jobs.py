@@ -0,0 +1,64 @@
+"""Jobs table for asynchronous idea generation.
+
+One row per POST /jobs/ideas call. The row is the durable record of the
+job, so queued or interrupted jobs can be picked up again after an API
+worker restarts.
+
+Revision: 003
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "003_jobs"
+down_revision = "002_seed_anonymous_user"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ── jobs ──────────────────────────────────────────────────────────────────
+    # status: queued → running → succeeded | failed
+    # run_id is deliberately not a foreign key: with write-behind enabled the
+    # run row may be committed after the job row is marked succeeded.
+    op.create_table(
+        "jobs",
+        sa.Column(
+            "id",
+            sa.dialects.postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            sa.dialects.postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("kind", sa.Text, nullable=False),
+        sa.Column("status", sa.Text, server_default="queued", nullable=False),
+        sa.Column("request", sa.dialects.postgresql.JSONB, nullable=False),
+        sa.Column("progress", sa.Text, nullable=True),  # last graph node reached
+        sa.Column("run_id", sa.dialects.postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    # Startup recovery scans for unfinished jobs.
+    op.create_index("idx_jobs_status", "jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_jobs_status", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,105 @@
+"""Compare the deep-agent and lean LLM engines: tokens, latency and turns.
+
+Both engines run the same idea and expand prompts through graph._invoke_agent.
+By default the chat model is a stub (scripts/stubs.py) that estimates input
+tokens from message and tool-schema size, so the deep agent's scaffolding
+overhead shows up without network access. --live uses the real model and
+its reported usage.
+
+    python scripts/bench_engine.py --calls 20 --latency fixed:50
+    python scripts/bench_engine.py --live --calls 3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from contextvars import ContextVar
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")  # every call must reach the model
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "0")
+os.environ.setdefault("OPENAI_RATE_PER_S", "0")
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+import app.graph as graph
+from scripts import stubs
+
+
+class UsageCounter(BaseCallbackHandler):
+    """Counts model turns and sums reported token usage."""
+
+    def __init__(self):
+        self.turns = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        self.turns += 1
+        for gens in response.generations:
+            for gen in gens:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+
+
+_counter: ContextVar[UsageCounter | None] = ContextVar("bench_usage_counter", default=None)
+register_configure_hook(_counter, inheritable=True)
+
+STATE = {"tech_stack": "Python, FastAPI, PostgreSQL", "level": "Intermediate", "web_context": "x " * 500}
+PROMPTS = {
+    "ideas": graph._idea_prompt(STATE, 3),
+    "expand": "Expand this project idea:\n" + '{"name": "Stub", "problem_statement": "Stub.", "implementation_plan": []}',
+}
+
+
+def run(engine: str, kind: str, calls: int) -> dict:
+    graph.LLM_ENGINE = engine
+    latencies = []
+    counter = UsageCounter()
+    token = _counter.set(counter)
+    try:
+        for _ in range(calls):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # silence the logging middleware
+                graph._invoke_agent(kind, PROMPTS[kind])
+            latencies.append(time.perf_counter() - start)
+    finally:
+        _counter.reset(token)
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "turns": counter.turns / calls,
+        "input_tokens": counter.input_tokens / calls,
+        "output_tokens": counter.output_tokens / calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deep-agent vs lean LLM engine")
+    parser.add_argument("--calls", type=int, default=20, help="Calls per engine and agent kind")
+    parser.add_argument("--latency", default="fixed:50", help="Stub model latency spec (see scripts/stubs.py)")
+    parser.add_argument("--live", action="store_true", help="Use the real model (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    if not args.live:
+        stubs.install_chat_model(args.latency)
+
+    print(f"{'kind':7} {'engine':6} {'p50':>9} {'max':>9} {'turns':>6} {'in tok':>8} {'out tok':>8}")
+    for kind in ("ideas", "expand"):
+        for engine in ("deep", "lean"):
+            r = run(engine, kind, args.calls)
+            print(
+                f"{kind:7} {engine:6} {r['p50_ms']:7.1f}ms {r['max_ms']:7.1f}ms "
+                f"{r['turns']:6.2f} {r['input_tokens']:8.0f} {r['output_tokens']:8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Latency and throughput of expand_idea at different micro-batch windows (stub model).
+
+Many clients call expand_idea concurrently through the OpenAI limiter.
+Window 0 means batching off (one LLM call per idea). System-prompt tokens
+are estimated as characters / 4 per LLM call.
+
+    python scripts/bench_expand_batching.py --clients 32 --requests 256 --windows 0,10,25,50,100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+os.environ.setdefault("OPENAI_RATE_PER_S", "0")         # cap by concurrency only
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "4")
+os.environ.setdefault("LIMITER_WAIT_TIMEOUT_S", "600")
+
+import app.graph as graph
+from app.services.batching import MicroBatcher
+from scripts import stubs
+
+
+def _pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def run(window_ms: float, max_batch: int, clients: int, requests: int, agents: dict) -> dict:
+    graph.EXPAND_BATCH_ENABLED = window_ms > 0
+    graph._expand_batcher = MicroBatcher(
+        "expand", graph._expand_many, window_s=window_ms / 1000, max_batch=max_batch,
+    )
+    calls_before = agents["expand_agent"].calls + agents["expand_batch_agent"].calls
+    ideas = [stubs.fake_idea(i) for i in range(requests)]
+
+    def one(idea):
+        start = time.perf_counter()
+        graph.expand_idea(idea)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(one, ideas))
+    elapsed = time.perf_counter() - start
+    calls = agents["expand_agent"].calls + agents["expand_batch_agent"].calls - calls_before
+    system_chars = len(graph._EXPAND_BATCH_SYSTEM if window_ms > 0 else graph._EXPAND_SYSTEM)
+    return {
+        "p50": statistics.median(latencies),
+        "p95": _pct(latencies, 95),
+        "throughput": requests / elapsed,
+        "calls": calls,
+        "system_tokens": calls * system_chars // 4,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark expand micro-batching windows")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--requests", type=int, default=256, help="Total expand calls per window")
+    parser.add_argument("--windows", default="0,10,25,50,100", help="Batch windows in ms (0 = off)")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:800:0.3", help="Base latency per LLM call")
+    parser.add_argument("--ms-per-token", type=float, default=5.0, help="Decode time per output token")
+    args = parser.parse_args()
+
+    agents = stubs.install(expand_latency=args.latency, expand_ms_per_token=args.ms_per_token)
+
+    print(f"{'window':>7} {'p50':>7} {'p95':>7} {'expands/s':>10} {'LLM calls':>9} {'sys tokens':>10}")
+    for window in (float(w) for w in args.windows.split(",")):
+        r = run(window, args.max_batch, args.clients, args.requests, agents)
+        label = f"{window:.0f}ms" if window else "off"
+        print(
+            f"{label:>7} {r['p50']:6.2f}s {r['p95']:6.2f}s {r['throughput']:10.1f} "
+            f"{r['calls']:9d} {r['system_tokens']:10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare expand_idea latency with and without request hedging (stub model).
+
+The stub expand agent has a heavy-tailed (Pareto) latency distribution, so
+a few calls are far slower than the median — the case hedging targets.
+
+    python scripts/bench_hedging.py --calls 1500 --concurrency 16 --latency pareto:20:1.5:2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "0")  # measure hedging, not the limiter
+os.environ.setdefault("OPENAI_RATE_PER_S", "0")
+
+import app.graph as graph
+from app.services import hedging
+from scripts import stubs
+
+IDEA = stubs.fake_idea(1)
+
+
+def _pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def run(calls: int, concurrency: int, hedge: bool) -> tuple[list[float], dict]:
+    hedging.HEDGE_ENABLED = hedge
+    graph._HEDGERS["expand"] = hedging.Hedger("expand")
+
+    def one(_):
+        start = time.perf_counter()
+        graph.expand_idea(IDEA)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(calls)))
+    return latencies, graph._HEDGERS["expand"].stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged expand calls against a stub model")
+    parser.add_argument("--calls", type=int, default=1500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="pareto:20:1.5:2000", help="Stub latency spec (see scripts/stubs.py)")
+    args = parser.parse_args()
+
+    stubs.install(expand_latency=args.latency)
+
+    for hedge in (False, True):
+        latencies, stats = run(args.calls, args.concurrency, hedge)
+        label = "hedged  " if hedge else "baseline"
+        print(
+            f"{label}  p50={statistics.median(latencies) * 1000:7.1f}ms  "
+            f"p95={_pct(latencies, 95) * 1000:7.1f}ms  p99={_pct(latencies, 99) * 1000:7.1f}ms  "
+            f"max={max(latencies) * 1000:7.1f}ms"
+        )
+        if hedge:
+            print(
+                f"          hedged {stats['hedged']}/{stats['calls']} calls "
+                f"({stats['hedge_fraction']:.1%}), backup won {stats['hedge_wins']}, "
+                f"threshold {stats['threshold_s']}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
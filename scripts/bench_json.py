@@ -0,0 +1,113 @@
+"""Stdlib json vs orjson on realistic Dev-Strom payloads (no network, no DB).
+
+Compares the three paths that now use orjson:
+  - API responses: FastAPI's default (jsonable_encoder + json.dumps) and the
+    old compact json.dumps in _conditional_json, against orjson.dumps;
+  - JSONB binds/results: json.dumps / json.loads against the engine's
+    orjson serializer / deserializer;
+  - reply parsing: json.loads against orjson.loads on an idea reply, plus
+    the full _parse_ideas on a text reply (which also runs Pydantic validation).
+
+    python scripts/bench_json.py --ideas 5 --history 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.graph import _parse_ideas
+
+_SENTENCE = "Build a resilient ingestion pipeline — with retries, idempotent writes and per-tenant quotas. "
+
+
+def _idea(n: int) -> dict:
+    return {
+        "pid": n,
+        "name": f"Multi-tenant Event Ledger {n}",
+        "problem_statement": _SENTENCE * 3,
+        "why_it_fits": [f"FastAPI {i}: async endpoints and dependency injection fit the service layer." for i in range(3)],
+        "real_world_value": _SENTENCE * 2,
+        "implementation_plan": [f"Step {i}: {_SENTENCE}" for i in range(1, 7)],
+    }
+
+
+def payloads(n_ideas: int, n_history: int) -> dict[str, object]:
+    ideas = [_idea(n) for n in range(1, n_ideas + 1)]
+    now = datetime.now(timezone.utc).isoformat()
+    run = {
+        "run_id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "tech_stack": "Python, FastAPI, Postgres",
+        "domain": "fintech", "level": "portfolio", "count": n_ideas, "enable_multi_query": True,
+        "ideas": ideas, "web_context": ("**Result** " + _SENTENCE * 4 + "\n\n") * 12, "created_at": now,
+    }
+    history = {
+        "runs": [
+            {"run_id": str(uuid.uuid4()), "tech_stack": "Python, FastAPI", "domain": None, "level": None,
+             "count": n_ideas, "idea_names": [i["name"] for i in ideas], "created_at": now}
+            for _ in range(n_history)
+        ],
+        "limit": n_history,
+        "offset": 0,
+    }
+    return {
+        "ideas response": {"ideas": ideas, "run_id": run["run_id"]},
+        "run detail": run,
+        "history page": history,
+        "extended_plan": [f"Step {i}: {_SENTENCE * 3}" for i in range(1, 9)],
+    }
+
+
+def _bench(fn, number: int) -> float:
+    """Best-of-5 microseconds per call."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def _row(label: str, size: int, old_us: float, new_us: float) -> None:
+    print(f"{label:<34} {size / 1024:7.1f} KB {old_us:9.1f} µs {new_us:9.1f} µs {old_us / new_us:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stdlib json vs orjson on Dev-Strom payloads")
+    parser.add_argument("--ideas", type=int, default=5, help="Ideas per run")
+    parser.add_argument("--history", type=int, default=100, help="Runs per history page")
+    parser.add_argument("--number", type=int, default=200, help="Calls per timing")
+    args = parser.parse_args()
+    n = args.number
+    data = payloads(args.ideas, args.history)
+
+    print(f"{'payload / path':<34} {'size':>10} {'stdlib':>12} {'orjson':>12} {'speedup':>8}")
+    for name in ("ideas response", "run detail", "history page"):
+        payload = data[name]
+        size = len(orjson.dumps(payload))
+        _row(f"{name}: FastAPI default", size,
+             _bench(lambda: json.dumps(jsonable_encoder(payload), ensure_ascii=False).encode(), n),
+             _bench(lambda: orjson.dumps(payload), n))
+        _row(f"{name}: compact dumps", size,
+             _bench(lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(), n),
+             _bench(lambda: orjson.dumps(payload), n))
+
+    for name in ("ideas response", "extended_plan"):
+        value = data[name]["ideas"] if name == "ideas response" else data[name]
+        text = json.dumps(value)
+        _row(f"JSONB {name}: serialize", len(text), _bench(lambda: json.dumps(value), n),
+             _bench(lambda: orjson.dumps(value).decode(), n))
+        _row(f"JSONB {name}: deserialize", len(text), _bench(lambda: json.loads(text), n),
+             _bench(lambda: orjson.loads(text), n))
+
+    reply = json.dumps({"ideas": [{k: v for k, v in i.items() if k != "pid"} for i in data["ideas response"]["ideas"]]})
+    _row("idea reply: loads", len(reply), _bench(lambda: json.loads(reply), n), _bench(lambda: orjson.loads(reply), n))
+    parse_us = _bench(lambda: _parse_ideas(reply), n)
+    print(f"{'idea reply: _parse_ideas (orjson)':<34} {len(reply) / 1024:7.1f} KB {'':>12} {parse_us:9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Exercise the provider limiter with a burst of stub calls (no network).
+
+Fires --calls concurrent requests at a stub provider through a
+ProviderLimiter and prints admitted/rejected counts and wait-time metrics.
+
+    python scripts/bench_limiter.py --calls 60 --rate 5 --concurrency 4 --timeout 3
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+
+from app.services.limiter import AdmissionTimeout, ProviderLimiter
+from scripts.stubs import parse_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst-test the provider limiter")
+    parser.add_argument("--calls", type=int, default=60, help="Concurrent calls to fire")
+    parser.add_argument("--rate", type=float, default=5.0, help="Token-bucket rate (calls/s)")
+    parser.add_argument("--burst", type=int, default=5, help="Token-bucket burst size")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max calls in flight")
+    parser.add_argument("--timeout", type=float, default=3.0, help="Admission wait timeout (s)")
+    parser.add_argument("--latency", default="lognormal:300:0.5", help="Stub provider latency spec")
+    args = parser.parse_args()
+
+    lim = ProviderLimiter(
+        "stub",
+        rate_per_s=args.rate,
+        burst=args.burst,
+        max_concurrency=args.concurrency,
+        wait_timeout_s=args.timeout,
+    )
+    latency = parse_latency(args.latency)
+    retry_afters: list[int] = []
+    peak_in_flight = 0
+    lock = threading.Lock()
+
+    def provider_call():
+        nonlocal peak_in_flight
+        with lock:
+            peak_in_flight = max(peak_in_flight, lim.stats()["in_flight"])
+        time.sleep(latency())
+
+    def worker():
+        try:
+            lim.call(provider_call)
+        except AdmissionTimeout as exc:
+            with lock:
+                retry_afters.append(exc.retry_after)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stats = lim.stats()
+    print(f"elapsed:            {elapsed:.2f}s")
+    print(f"admitted / rejected: {stats['admitted']} / {stats['rejected']}")
+    print(f"peak in flight:     {peak_in_flight} (cap {args.concurrency})")
+    print(f"admitted rate:      {stats['admitted'] / elapsed:.2f}/s (cap {args.rate}/s + burst {args.burst})")
+    print(f"wait avg/p95/max:   {stats['wait_avg_s']:.3f}s / {stats['wait_p95_s']:.3f}s / {stats['wait_max_s']:.3f}s")
+    if retry_afters:
+        print(f"Retry-After range:  {min(retry_afters)}–{max(retry_afters)}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare batch and parallel idea generation wall-clock time (stub model).
+
+The stub idea agent has a base latency plus decode time per output token,
+so a single completion for N ideas grows with N while parallel single-idea
+calls stay close to the latency of one idea.
+
+    python scripts/bench_parallel_ideas.py --runs 5 --latency lognormal:600:0.3 --ms-per-token 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "0")  # measure generation, not the limiter
+os.environ.setdefault("OPENAI_RATE_PER_S", "0")
+
+import app.graph as graph
+from scripts import stubs
+
+
+def _state(count: int) -> dict:
+    web = stubs.StubTavilyClient(lambda: 0).search("python fastapi project ideas")["results"]
+    return {
+        "tech_stack": "Python, FastAPI, PostgreSQL",
+        "domain": "fintech",
+        "level": "Intermediate",
+        "count": count,
+        "web_context": "\n\n".join(f"**{r['title']}**\n{r['content']}" for r in web),
+    }
+
+
+def run(mode: str, count: int, runs: int, agent: stubs.StubAgent) -> tuple[float, float, int]:
+    graph.IDEA_GENERATION_MODE = mode
+    calls_before = agent.calls
+    times, filled = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        ideas = graph.generate_ideas(_state(count))["ideas"]
+        times.append(time.perf_counter() - start)
+        filled += sum(1 for i in ideas if i["name"])
+    return statistics.median(times), (agent.calls - calls_before) / runs, filled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch vs parallel idea generation")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per mode and count")
+    parser.add_argument("--latency", default="lognormal:600:0.3", help="Base latency per call (see scripts/stubs.py)")
+    parser.add_argument("--ms-per-token", type=float, default=8.0, help="Decode time per output token")
+    args = parser.parse_args()
+
+    agent = stubs.install(idea_latency=args.latency, idea_ms_per_token=args.ms_per_token)["idea_agent"]
+
+    print(f"{'count':>5} {'mode':8} {'p50':>8} {'calls/run':>9} {'filled':>8}")
+    for count in range(1, 6):
+        for mode in ("batch", "parallel"):
+            p50, calls, filled = run(mode, count, args.runs, agent)
+            print(f"{count:5d} {mode:8} {p50:7.2f}s {calls:9.1f} {filled:4d}/{count * args.runs}")
+
+
+if __name__ == "__main__":
+    main()
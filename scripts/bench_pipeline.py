@@ -0,0 +1,54 @@
+"""Compare sequential and pipelined multi-query runs of the full graph (stubs).
+
+Tavily latency is heavy-tailed, so the slowest of the 3–4 queries usually
+dominates the search phase; pipelined mode starts generating once the
+primary query plus one more have returned.
+
+    python scripts/bench_pipeline.py --runs 10 --tavily-latency lognormal:600:0.8
+"""
+
+import argparse
+import os
+import sys
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "0")
+os.environ.setdefault("OPENAI_RATE_PER_S", "0")
+os.environ.setdefault("TAVILY_MAX_CONCURRENCY", "0")
+os.environ.setdefault("TAVILY_RATE_PER_S", "0")
+
+import app.graph as graph
+import app.tools as tools
+from app.services import pipeline_timing
+from scripts import stubs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipelined vs sequential search → generate")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tavily-latency", default="lognormal:600:0.8")
+    parser.add_argument("--idea-latency", default="lognormal:1500:0.3")
+    args = parser.parse_args()
+
+    stubs.install(idea_latency=args.idea_latency, tavily_latency=args.tavily_latency)
+    inputs = {"tech_stack": "Python, FastAPI", "domain": "fintech", "count": 3, "enable_multi_query": True}
+
+    for pipelined in (False, True):
+        graph.PIPELINE_ENABLED = pipelined
+        for _ in range(args.runs):
+            graph.app.invoke(inputs)
+
+    # Stragglers of the last pipelined runs may still be searching.
+    tools._search_executor.shutdown(wait=True)
+
+    for label, s in pipeline_timing.stats().items():
+        print(
+            f"{label:10}  runs={s['runs']:3d}  context after {s['avg_context_wait_s']:.2f}s  "
+            f"search {s['avg_search_s']:.2f}s  generate {s['avg_generate_s']:.2f}s  "
+            f"overlap {s['avg_overlap_s']:.2f}s  total {s['avg_total_s']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Export runs and their expanded ideas as JSON Lines (for warehouse loads).
+
+Same rows and filters as GET /admin/runs/export.jsonl, read directly from the
+database with a server-side cursor, so memory stays flat on any table size.
+
+    python scripts/export_runs.py --since 2026-01-01 --until 2026-02-01 -o runs.jsonl
+    python scripts/export_runs.py --tech-stack fastapi | gzip > fastapi_runs.jsonl.gz
+"""
+
+import argparse
+import os
+import sys
+import uuid
+from datetime import datetime
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(root, ".env"))
+
+from app.services.bulk_export import stream_jsonl
+from app.services.run_service import iter_runs_for_analytics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Dev-Strom runs as JSON Lines")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Runs created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Runs created before (ISO 8601)")
+    parser.add_argument("--tech-stack", help="Case-insensitive substring of tech_stack")
+    parser.add_argument("--user-id", type=uuid.UUID, help="Only this user's runs (default: all)")
+    parser.add_argument("--include-web-context", action="store_true")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    rows = iter_runs_for_analytics(
+        since=args.since,
+        until=args.until,
+        tech_stack=args.tech_stack,
+        user_id=args.user_id,
+        include_web_context=args.include_web_context,
+    )
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_jsonl(rows):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""Load-test the API with stubbed Tavily/LLM providers and a local Postgres.
+
+Drives /ideas, /expand, /export, /history and /runs/{id} either with a
+synthetic mix at a fixed arrival rate (Poisson, open loop) or by replaying
+a JSONL trace recorded with REQUEST_TRACE_PATH (see app/services/request_trace.py).
+Run IDs in a trace are mapped onto runs created during the test.
+
+The app runs in this process (TestClient), or behind uvicorn on localhost
+with --http; --url targets an already running server (no stubs then).
+Persistence uses DATABASE_URL from .env, so point it at a scratch database.
+
+Reports throughput, p50/p95/p99 per endpoint and error rate, plus peak
+threadpool, DB pool and OpenAI limiter occupancy sampled from /admin/metrics.
+Latency is measured from each request's scheduled start, so client-side
+queueing counts (no coordinated omission).
+
+    python scripts/load_test.py --rate 20 --duration 60 --mix ideas:1,expand:3,export:1,history:3,run:4
+    python scripts/load_test.py --trace traces/prod.jsonl --speed 2 --http --threads 20
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, root)
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(root, ".env"))
+os.environ.setdefault("OPENAI_API_KEY", "stub")   # the endpoints check that keys are configured
+os.environ.setdefault("TAVILY_API_KEY", "stub")
+os.environ["LLM_CACHE_ENABLED"] = "false"         # every /ideas should reach the (stub) model
+os.environ["LANGCHAIN_TRACING"] = "false"
+os.environ["REQUEST_TRACE_PATH"] = ""              # don't record the load test itself
+
+import httpx
+
+ENDPOINTS = ("ideas", "expand", "export", "history", "run")
+TECH_STACKS = ("Python, FastAPI", "React, TypeScript", "Go, gRPC", "Rust, Tokio", "Java, Spring", "Elixir, Phoenix")
+_RUN_PATH_RE = re.compile(r"^/runs/([^/]+)$")
+
+
+# ── run pool ──────────────────────────────────────────────────────────────────
+
+class RunPool:
+    """Runs created so far (run_id → idea count) and the mapping from traced run IDs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: dict[str, int] = {}
+        self._mapped: dict[str, str] = {}
+
+    def add(self, run_id: str, n_ideas: int) -> None:
+        with self._lock:
+            self._runs[run_id] = max(1, n_ideas)
+
+    def pick(self, traced_id: str | None = None) -> tuple[str, int] | None:
+        with self._lock:
+            if not self._runs:
+                return None
+            if traced_id is not None and traced_id in self._mapped:
+                run_id = self._mapped[traced_id]
+            else:
+                run_id = random.choice(list(self._runs))
+                if traced_id is not None:
+                    self._mapped[traced_id] = run_id
+            return run_id, self._runs[run_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._runs)
+
+
+# ── requests ──────────────────────────────────────────────────────────────────
+
+def build(endpoint: str, pool: RunPool, traced: dict | None = None) -> tuple[str, str, dict] | None:
+    """Return (method, url, httpx kwargs) for one request, or None if no run exists yet."""
+    traced = traced or {}
+    body = traced.get("body") or {}
+    if endpoint == "ideas":
+        body = body or {"tech_stack": random.choice(TECH_STACKS), "count": 3}
+        return "POST", "/ideas", {"json": body}
+    if endpoint == "history":
+        return "GET", "/history", {"params": traced.get("query") or {"limit": 20}}
+
+    picked = pool.pick(traced.get("run_id"))
+    if picked is None:
+        return None
+    run_id, n_ideas = picked
+    if endpoint == "run":
+        return "GET", f"/runs/{run_id}", {"params": traced.get("query") or {}}
+    pid = min(body.get("pid") or random.randint(1, n_ideas), n_ideas)
+    return "POST", f"/{endpoint}", {"json": {**body, "run_id": run_id, "pid": pid}}
+
+
+def classify(record: dict) -> tuple[str, dict] | None:
+    """Map a trace line onto (endpoint, traced fields); None for paths the harness doesn't drive."""
+    method, path, body = record["method"], record["path"], record.get("body") or {}
+    query = dict(httpx.QueryParams(record.get("query") or ""))
+    if method == "POST" and path in ("/ideas", "/expand", "/export"):
+        return path[1:], {"body": body, "run_id": body.get("run_id")}
+    if method == "GET" and path == "/history":
+        return "history", {"query": query}
+    if method == "GET" and (m := _RUN_PATH_RE.match(path)):
+        return "run", {"query": query, "run_id": m.group(1)}
+    return None
+
+
+def synthetic_schedule(mix: dict[str, float], rate: float, duration: float) -> list[tuple[float, str, dict]]:
+    names, weights = zip(*mix.items())
+    schedule, t = [], 0.0
+    while True:
+        t += random.expovariate(rate)
+        if t >= duration:
+            return schedule
+        schedule.append((t, random.choices(names, weights)[0], {}))
+
+
+def trace_schedule(path: str, speed: float) -> tuple[list[tuple[float, str, dict]], int]:
+    schedule, skipped = [], 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if (hit := classify(record)) is None:
+                skipped += 1
+                continue
+            schedule.append((record["t"] / speed, *hit))
+    schedule.sort(key=lambda item: item[0])
+    return schedule, skipped
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r} in --mix; use {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ── recording ─────────────────────────────────────────────────────────────────
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.skipped = Counter()
+
+    def skip(self, endpoint: str) -> None:
+        with self._lock:
+            self.skipped[endpoint] += 1
+
+    def record(self, endpoint: str, latency: float, status: int | str) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+
+
+class SaturationSampler(threading.Thread):
+    """Polls /admin/metrics and keeps peak/mean occupancy figures."""
+
+    def __init__(self, client: httpx.Client, interval: float):
+        super().__init__(name="metrics-sampler", daemon=True)
+        self._client = client
+        self._interval = interval
+        self._done = threading.Event()
+        self.samples: list[dict] = []
+
+    def run(self) -> None:
+        while not self._done.wait(self._interval):
+            try:
+                headers = {"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")}
+                response = self._client.get("/admin/metrics", headers=headers)
+                m = response.raise_for_status().json()
+            except Exception:
+                continue
+            self.samples.append({
+                "threads_busy": m["threadpool"]["busy"] - 1,  # minus the metrics call itself
+                "threads_size": m["threadpool"]["size"],
+                "threads_waiting": m["threadpool"]["waiting"],
+                "db_sync": m["db_pool"]["sync"]["checked_out"],
+                "db_sync_cap": m["db_pool"]["sync"]["capacity"],
+                "db_async": m["db_pool"]["async"]["checked_out"],
+                "db_async_cap": m["db_pool"]["async"]["capacity"],
+                "openai_queue": m["limiters"].get("openai", {}).get("queue_depth", 0),
+                "openai_in_flight": m["limiters"].get("openai", {}).get("in_flight", 0),
+            })
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+# ── driver ────────────────────────────────────────────────────────────────────
+
+def send(client: httpx.Client, pool: RunPool, results: Results, endpoint: str, traced: dict, scheduled: float) -> None:
+    request = build(endpoint, pool, traced)
+    if request is None:
+        results.skip(endpoint)
+        return
+    method, url, kwargs = request
+    try:
+        response = client.request(method, url, **kwargs)
+        status: int | str = response.status_code
+        if endpoint == "ideas" and status == 200:
+            data = response.json()
+            pool.add(data["run_id"], len(data.get("ideas", [])))
+    except Exception as exc:
+        status = type(exc).__name__
+    results.record(endpoint, time.perf_counter() - scheduled, status)
+
+
+def seed(client: httpx.Client, pool: RunPool, n: int, clients: int) -> None:
+    def one(_):
+        response = client.post("/ideas", json={"tech_stack": random.choice(TECH_STACKS), "count": 3})
+        response.raise_for_status()
+        data = response.json()
+        pool.add(data["run_id"], len(data.get("ideas", [])))
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(one, range(n)))
+
+
+def drive(client: httpx.Client, schedule, pool: RunPool, clients: int) -> tuple[Results, float]:
+    results = Results()
+    with ThreadPoolExecutor(max_workers=clients, thread_name_prefix="client") as executor:
+        start = time.perf_counter()
+        for offset, endpoint, traced in schedule:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, client, pool, results, endpoint, traced, start + offset)
+    return results, time.perf_counter() - start
+
+
+def _pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def report(results: Results, elapsed: float, samples: list[dict], skipped_trace: int) -> None:
+    total = sum(len(v) for v in results.latencies.values())
+    print(f"\n{total} requests in {elapsed:.1f}s → {total / elapsed:.1f} req/s\n")
+    print(f"{'endpoint':<9} {'n':>6} {'req/s':>7} {'err%':>6} {'503':>5} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for endpoint in ENDPOINTS:
+        lat = results.latencies.get(endpoint)
+        if not lat:
+            continue
+        statuses = results.statuses[endpoint]
+        errors = sum(c for s, c in statuses.items() if not (isinstance(s, int) and s < 400))
+        print(
+            f"{endpoint:<9} {len(lat):6d} {len(lat) / elapsed:7.1f} {100 * errors / len(lat):5.1f}% "
+            f"{statuses.get(503, 0):5d} {_pct(lat, 50):6.2f}s {_pct(lat, 95):6.2f}s {_pct(lat, 99):6.2f}s"
+        )
+    for endpoint, statuses in results.statuses.items():
+        odd = {s: c for s, c in statuses.items() if s not in (200, 503)}
+        if odd:
+            print(f"  {endpoint}: {odd}")
+    if results.skipped:
+        print(f"skipped (no run yet): {dict(results.skipped)}")
+    if skipped_trace:
+        print(f"trace lines for other endpoints ignored: {skipped_trace}")
+
+    if not samples:
+        return
+
+    def peak(key):
+        return max(s[key] for s in samples)
+
+    def mean(key):
+        return sum(s[key] for s in samples) / len(samples)
+
+    print(f"\nsaturation ({len(samples)} samples)")
+    print(
+        f"  threadpool  busy peak {peak('threads_busy')}/{samples[-1]['threads_size']}"
+        f"  mean {mean('threads_busy'):.1f}  waiting peak {peak('threads_waiting')}"
+    )
+    print(
+        f"  db pool     sync peak {peak('db_sync')}/{samples[-1]['db_sync_cap']}"
+        f"  async peak {peak('db_async')}/{samples[-1]['db_async_cap']}"
+    )
+    print(
+        f"  openai      in flight peak {peak('openai_in_flight')}"
+        f"  queue peak {peak('openai_queue')}  mean {mean('openai_queue'):.1f}"
+    )
+
+
+def _serve(port: int):
+    import uvicorn
+
+    from app.api import api
+
+    server = uvicorn.Server(uvicorn.Config(api, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Dev-Strom API with stubbed providers")
+    parser.add_argument("--rate", type=float, default=10.0, help="Mean arrivals per second (synthetic mix)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of synthetic load")
+    parser.add_argument("--mix", default="ideas:1,expand:3,export:1,history:3,run:4", help="endpoint:weight,...")
+    parser.add_argument("--trace", help="Replay a recorded JSONL trace instead of the synthetic mix")
+    parser.add_argument("--speed", type=float, default=1.0, help="Trace replay speed-up factor")
+    parser.add_argument("--seed-runs", type=int, default=10, help="Runs created before the measured phase")
+    parser.add_argument("--clients", type=int, default=200, help="Max concurrent client requests")
+    parser.add_argument("--threads", type=int, default=0, help="Server THREADPOOL_SIZE (0 = default)")
+    parser.add_argument("--http", action="store_true", help="Serve with uvicorn on localhost instead of in-process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Target an already running server (providers are not stubbed)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between metrics samples")
+    parser.add_argument("--idea-latency", default="lognormal:4000:0.4", help="Stub idea-generation latency")
+    parser.add_argument("--expand-latency", default="lognormal:2500:0.4", help="Stub expand latency")
+    parser.add_argument("--tavily-latency", default="lognormal:600:0.6", help="Stub Tavily latency")
+    args = parser.parse_args()
+
+    if args.threads:
+        os.environ["THREADPOOL_SIZE"] = str(args.threads)
+    if args.trace:
+        schedule, skipped_trace = trace_schedule(args.trace, args.speed)
+    else:
+        schedule, skipped_trace = synthetic_schedule(parse_mix(args.mix), args.rate, args.duration), 0
+
+    server = None
+    if args.url:
+        client = httpx.Client(base_url=args.url, timeout=None, limits=httpx.Limits(max_connections=args.clients))
+    else:
+        # In-process server: give /admin/metrics a token so the sampler can read it.
+        os.environ.setdefault("ADMIN_TOKEN", secrets.token_hex(16))
+        import app.graph as graph
+        from scripts import stubs
+
+        stubs.install(
+            idea_latency=args.idea_latency,
+            expand_latency=args.expand_latency,
+            tavily_latency=args.tavily_latency,
+        )
+        if graph.LLM_ENGINE == "lean":
+            stubs.install_chat_model(args.expand_latency)
+        if args.http:
+            server, thread = _serve(args.port)
+            client = httpx.Client(
+                base_url=f"http://127.0.0.1:{args.port}",
+                timeout=None,
+                limits=httpx.Limits(max_connections=args.clients),
+            )
+        else:
+            from fastapi.testclient import TestClient
+
+            from app.api import api
+
+            client = TestClient(api).__enter__()  # runs the lifespan (job pool, write-behind)
+
+    pool = RunPool()
+    try:
+        print(f"seeding {args.seed_runs} runs…")
+        seed(client, pool, args.seed_runs, min(args.clients, 8))
+        print(f"driving {len(schedule)} requests…")
+        sampler = SaturationSampler(client, args.sample_interval)
+        sampler.start()
+        results, elapsed = drive(client, schedule, pool, args.clients)
+        sampler.stop()
+        report(results, elapsed, sampler.samples, skipped_trace)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+        elif hasattr(client, "__exit__"):
+            client.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
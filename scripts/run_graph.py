@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 load_dotenv(os.path.join(root, ".env"))
 
 from app.graph import app
+from app.services import profiling
 
 
 def main():
@@ -21,6 +22,10 @@ def main():
     parser.add_argument("--count", type=int, default=3, choices=range(1, 6), metavar="1-5", help="Number of ideas to generate (default: 3)")
     parser.add_argument("--stream", action="store_true", help="Stream graph steps and state after each node")
     parser.add_argument("--debug", action="store_true", help="Stream debug traces (node names, inputs, outputs)")
+    parser.add_argument("--profile", nargs="?", const="run_graph.collapsed", metavar="FILE",
+                        help="Sample stacks during the run and write collapsed stacks for a flame graph "
+                             "(default file: run_graph.collapsed)")
+    parser.add_argument("--trace-memory", action="store_true", help="With --profile, also print top allocations")
     args = parser.parse_args()
 
     if not os.getenv("OPENAI_API_KEY"):
@@ -39,6 +44,24 @@ def main():
         inputs["enable_multi_query"] = True
     inputs["count"] = args.count
 
+    if not args.profile:
+        _run(args, inputs)
+        return
+    with profiling.profile("run_graph", trace_memory=args.trace_memory, keep=False) as prof:
+        _run(args, inputs)
+    with open(args.profile, "w", encoding="utf-8") as f:
+        f.write(prof.collapsed())
+    print(f"\nprofile: {prof.samples} samples over {prof.duration_ms / 1000:.1f}s → {args.profile}")
+    print(f"  flamegraph.pl {args.profile} > run_graph.svg, or open it in speedscope.app")
+    for frame, count in prof.summary(top=10)["self"]:
+        print(f"  {count:6d}  {frame}")
+    if args.trace_memory:
+        print(f"peak traced memory: {prof.peak_memory_kb} KB")
+        for line in prof.allocations[:10]:
+            print(f"  {line}")
+
+
+def _run(args, inputs: dict) -> None:
     if args.debug:
         print("--- stream_mode=debug ---")
         for chunk in app.stream(inputs, stream_mode="debug"):
@@ -0,0 +1,214 @@
+"""Stub Tavily and LLM providers for benchmarks and load tests.
+
+Nothing here touches the network. Latencies come from small configurable
+distributions so tail behaviour (hedging, batching, limiter queueing) can
+be exercised offline.
+
+Latency specs are strings: "fixed:MS", "uniform:LO_MS:HI_MS",
+"lognormal:MEDIAN_MS:SIGMA" or "pareto:SCALE_MS:ALPHA[:CAP_MS]".
+
+    from scripts import stubs
+    stubs.install(idea_latency="lognormal:800:0.6", tavily_latency="fixed:300")
+"""
+
+import json
+import random
+import re
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+# ── latency distributions ─────────────────────────────────────────────────────
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Return a zero-arg function yielding latencies in seconds for *spec*."""
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: vals[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(vals[0], vals[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = vals
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    if kind == "pareto":
+        scale, alpha = vals[0], vals[1]
+        cap = vals[2] if len(vals) > 2 else float("inf")
+        return lambda: min(cap, scale * random.paretovariate(alpha)) / 1000
+    raise ValueError(f"Unknown latency spec {spec!r}")
+
+
+# ── canned payloads ───────────────────────────────────────────────────────────
+
+_COUNT_RE = re.compile(r"Output exactly (\d+) ideas")
+_VOCAB = (
+    "ledger queue cache index stream shard tenant invoice sensor webhook replica "
+    "catalog cohort forecast anomaly billing routing inventory audit consent schema "
+    "latency quota tracing search feed ranking checkout refund alert backlog"
+).split()
+
+
+def fake_idea(n: int, tag: str = "") -> dict:
+    words = " ".join(random.sample(_VOCAB, 8))  # distinct ideas share few words
+    return {
+        "name": f"Stub Project {n}{tag}",
+        "problem_statement": f"Stub problem {n} about {words}.",
+        "why_it_fits": [f"Tech {n}: fits because it is a stub."],
+        "real_world_value": "Lets us measure the pipeline without an LLM.",
+        "implementation_plan": [f"Step {i}: do stub thing {i}." for i in range(1, 4)],
+    }
+
+
+def fake_reply(user_content: str) -> str:
+    """Return a plausible JSON reply for an idea, expand or batched-expand prompt."""
+    if user_content.startswith("Expand this project idea"):
+        return json.dumps({"extended_plan": [f"Step {i}: stub detail {i}." for i in range(1, 6)]})
+    if user_content.startswith("Expand these project ideas"):
+        keys = json.loads(user_content.split("\n", 1)[1])
+        return json.dumps({"results": [
+            {"key": k, "extended_plan": [f"Step {i}: stub detail {i} for {k}." for i in range(1, 6)]}
+            for k in keys
+        ]})
+    m = _COUNT_RE.search(user_content)
+    count = int(m.group(1)) if m else 3
+    tag = f" #{random.randrange(10_000)}"
+    return json.dumps({"ideas": [fake_idea(i, tag) for i in range(1, count + 1)]})
+
+
+# ── stub providers ────────────────────────────────────────────────────────────
+
+class StubAgent:
+    """Duck-types a compiled deep agent: .invoke({"messages": [...]}) → {"messages": [...]}.
+
+    *ms_per_token* adds decode time per output token (characters / 4), so
+    longer replies take longer, as with a real model.
+    """
+
+    def __init__(
+        self,
+        latency: Callable[[], float],
+        reply: Callable[[str], str] = fake_reply,
+        ms_per_token: float = 0.0,
+    ):
+        self._latency = latency
+        self._reply = reply
+        self._ms_per_token = ms_per_token
+        self.calls = 0
+
+    def invoke(self, payload: dict, *args, **kwargs) -> dict:
+        self.calls += 1
+        user = payload["messages"][-1]
+        content = user["content"] if isinstance(user, dict) else user.content
+        text = self._reply(content)
+        time.sleep(self._latency() + len(text) / 4 * self._ms_per_token / 1000)
+        msg = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": len(content) // 4,
+                "output_tokens": len(text) // 4,
+                "total_tokens": (len(content) + len(text)) // 4,
+            },
+        )
+        return {"messages": [*payload["messages"], msg]}
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model stub usable both directly and inside a deep agent.
+
+    Input tokens are estimated as characters / 4 over every message plus the
+    JSON schemas of any bound tools, so scaffolding overhead is visible.
+    """
+
+    latency: Callable[[], float]
+    reply: Callable[[str], str] = fake_reply
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        prompt_chars += len(json.dumps(kwargs.get("tools", [])))
+        user = next((m for m in reversed(messages) if m.type == "human"), messages[-1])
+        time.sleep(self.latency())
+        text = self.reply(str(user.content))
+        msg = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": prompt_chars // 4,
+                "output_tokens": len(text) // 4,
+                "total_tokens": (prompt_chars + len(text)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+
+class StubTavilyClient:
+    """Duck-types TavilyClient.search()."""
+
+    def __init__(self, latency: Callable[[], float]):
+        self._latency = latency
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        self.calls += 1
+        time.sleep(self._latency())
+        return {
+            "results": [
+                {"title": f"{query} — result {i}", "content": f"Stub snippet {i} about {query}. " * 8}
+                for i in range(1, max_results + 1)
+            ]
+        }
+
+
+def install(
+    *,
+    idea_latency: str = "fixed:500",
+    expand_latency: str = "fixed:300",
+    tavily_latency: str = "fixed:200",
+    idea_ms_per_token: float = 0.0,
+    expand_ms_per_token: float = 0.0,
+) -> dict:
+    """Swap the real agents and Tavily client for stubs. Returns the stub objects."""
+    import app.graph as graph
+    import app.tools as tools
+
+    stubs = {
+        "idea_agent": StubAgent(parse_latency(idea_latency), ms_per_token=idea_ms_per_token),
+        "expand_agent": StubAgent(parse_latency(expand_latency), ms_per_token=expand_ms_per_token),
+        "expand_batch_agent": StubAgent(parse_latency(expand_latency), ms_per_token=expand_ms_per_token),
+        "tavily": StubTavilyClient(parse_latency(tavily_latency)),
+    }
+    graph._get_idea_agent = lambda: stubs["idea_agent"]
+    graph._get_expand_agent = lambda: stubs["expand_agent"]
+    graph._get_expand_batch_agent = lambda: stubs["expand_batch_agent"]
+    tools._get_client = lambda: nullcontext(stubs["tavily"])
+    return stubs
+
+
+def install_chat_model(latency: str = "fixed:300") -> StubChatModel:
+    """Back the real deep agents *and* the lean engine with one StubChatModel.
+
+    Unlike install(), the deep-agent scaffolding (middleware, tool schemas,
+    agent loop) stays in place, so the two engines can be compared.
+    """
+    import app.graph as graph
+
+    model = StubChatModel(latency=parse_latency(latency))
+    graph.MODEL = model
+    graph._get_idea_agent.cache_clear()
+    graph._get_expand_agent.cache_clear()
+    graph._get_expand_batch_agent.cache_clear()
+    graph._get_chat_model = lambda: nullcontext(model)
+    return model
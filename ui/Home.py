@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -13,6 +14,10 @@ load_dotenv()
 import ui.api_client as api
 from ui.components import render_idea_card
 
+# Submit generation as a background job and poll, instead of holding one
+# long HTTP request open (survives proxies that cut idle connections).
+USE_JOBS = os.getenv("UI_IDEAS_JOB_MODE", "false").lower() == "true"
+
 st.set_page_config(page_title="Dev-Strom", page_icon="💡")
 st.title("Dev-Strom ⛈️")
 st.caption("Get curated project ideas for any tech stack or job role")
@@ -38,6 +43,11 @@ enable_multi_query = st.checkbox(
     value=True,
     help="Run 2-3 web queries and merge results for better coverage",
 )
+fresh = st.checkbox(
+    "Always generate new ideas",
+    value=False,
+    help="Skip cached model responses for identical requests",
+)
 
 if st.button("Get ideas", type="primary"):
     if not tech_stack.strip():
@@ -46,13 +56,30 @@ if st.button("Get ideas", type="primary"):
 
     with st.spinner("Fetching web context and generating ideas…"):
         try:
-            result = api.get_ideas(
-                tech_stack.strip(),
-                domain=domain,
-                level=level,
-                count=int(count),
-                enable_multi_query=enable_multi_query,
-            )
+            if USE_JOBS:
+                job_id = api.start_ideas_job(
+                    tech_stack.strip(),
+                    domain=domain,
+                    level=level,
+                    count=int(count),
+                    enable_multi_query=enable_multi_query,
+                    fresh=fresh,
+                )
+                status = st.empty()
+                result = api.wait_for_job(
+                    job_id,
+                    on_progress=lambda node: status.caption(f"Step finished: {node}" if node else "Queued…"),
+                )
+                status.empty()
+            else:
+                result = api.get_ideas(
+                    tech_stack.strip(),
+                    domain=domain,
+                    level=level,
+                    count=int(count),
+                    enable_multi_query=enable_multi_query,
+                    fresh=fresh,
+                )
         except Exception as exc:
             st.error(f"API error: {exc}")
             st.stop()
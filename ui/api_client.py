@@ -1,9 +1,21 @@
 """
 HTTP client for the Dev-Strom FastAPI backend.
 All Streamlit pages call these functions — never graph.py directly.
+
+All sync calls share one pooled keep-alive httpx.Client, so consecutive UI
+actions reuse the same TCP/TLS connection. The async helpers at the bottom
+open an httpx.AsyncClient per batch and fan several calls out in parallel
+(e.g. prefetching run details or exporting every idea of a run).
 """
 
+import asyncio
+import importlib.util
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
 import httpx
 from dotenv import load_dotenv
@@ -12,22 +24,133 @@ load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# ── connection settings ────────────────────────────────────────────────────────
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))                 # connect-level retries
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+API_KEEPALIVE_EXPIRY = float(os.getenv("API_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]").
+API_HTTP2 = (
+    os.getenv("API_HTTP2", "true").lower() == "true"
+    and importlib.util.find_spec("h2") is not None
+)
+API_ASYNC_CONCURRENCY = int(os.getenv("API_ASYNC_CONCURRENCY", "4"))
+
+# Last (ETag, raw body) seen per GET url+params. Streamlit reruns repeat the same
+# GETs constantly; revalidating with If-None-Match turns those into 304s.
+# Shared by every Streamlit session thread, hence the lock; least recently
+# used first.
+# Bodies are kept as bytes and parsed on every hit, so no two callers ever
+# share (and mutate) the same dict.
+_ETAG_CACHE: OrderedDict[tuple, tuple[str, bytes]] = OrderedDict()
+_ETAG_CACHE_MAX = 256
+_etag_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=API_MAX_CONNECTIONS,
+        max_keepalive_connections=API_MAX_CONNECTIONS,
+        keepalive_expiry=API_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout(seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(seconds, connect=API_CONNECT_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def _client() -> httpx.Client:
+    """Process-wide pooled client (httpx.Client is thread-safe)."""
+    return httpx.Client(
+        base_url=API_BASE_URL,
+        timeout=_timeout(30),
+        transport=httpx.HTTPTransport(
+            retries=API_RETRIES, http2=API_HTTP2, limits=_limits(),
+        ),
+    )
+
+
+def async_client() -> httpx.AsyncClient:
+    """Return a new AsyncClient with the same settings as the shared sync client.
+
+    Async clients are bound to the event loop they are used on, so create one
+    per batch (``async with async_client() as client: ...``) instead of caching.
+    """
+    return httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        timeout=_timeout(30),
+        transport=httpx.AsyncHTTPTransport(
+            retries=API_RETRIES, http2=API_HTTP2, limits=_limits(),
+        ),
+    )
+
+
 # ── shared request helpers ─────────────────────────────────────────────────────
 
 
+def _etag_key(path: str, params: dict | None) -> tuple:
+    return (path, tuple(sorted((params or {}).items())))
+
+
+def _revalidate(key: tuple) -> tuple[dict | None, bytes | None]:
+    """Return (If-None-Match headers, cached raw body) for a GET cache key."""
+    with _etag_lock:
+        cached = _ETAG_CACHE.get(key)
+        if cached:
+            _ETAG_CACHE.move_to_end(key)
+    if not cached:
+        return None, None
+    return {"If-None-Match": cached[0]}, cached[1]
+
+
+def _remember(key: tuple, response: httpx.Response) -> None:
+    if etag := response.headers.get("etag"):
+        with _etag_lock:
+            _ETAG_CACHE[key] = (etag, response.content)
+            _ETAG_CACHE.move_to_end(key)
+            while len(_ETAG_CACHE) > _ETAG_CACHE_MAX:
+                _ETAG_CACHE.popitem(last=False)
+
+
 def _post(path: str, payload: dict, *, timeout: int = 120) -> dict:
     """POST to the FastAPI server and return the parsed JSON body."""
-    url = f"{API_BASE_URL}{path}"
-    response = httpx.post(url, json=payload, timeout=timeout)
+    response = _client().post(path, json=payload, timeout=_timeout(timeout))
     response.raise_for_status()
     return response.json()
 
 
 def _get(path: str, *, params: dict | None = None, timeout: int = 30) -> dict:
-    """GET from the FastAPI server and return the parsed JSON body."""
-    url = f"{API_BASE_URL}{path}"
-    response = httpx.get(url, params=params, timeout=timeout)
+    """GET from the FastAPI server and return the parsed JSON body.
+
+    Sends If-None-Match when a previous response carried an ETag and reuses
+    the cached body (parsed afresh for each caller) on 304 Not Modified.
+    """
+    key = _etag_key(path, params)
+    headers, cached = _revalidate(key)
+    response = _client().get(path, params=params, headers=headers, timeout=_timeout(timeout))
+    if response.status_code == 304 and cached is not None:
+        return json.loads(cached)
     response.raise_for_status()
+    _remember(key, response)
+    return response.json()
+
+
+async def _aget(
+    client: httpx.AsyncClient,
+    path: str,
+    *,
+    params: dict | None = None,
+    timeout: int = 30,
+) -> dict:
+    """Async twin of _get(), sharing the same ETag cache."""
+    key = _etag_key(path, params)
+    headers, cached = _revalidate(key)
+    response = await client.get(path, params=params, headers=headers, timeout=_timeout(timeout))
+    if response.status_code == 304 and cached is not None:
+        return json.loads(cached)
+    response.raise_for_status()
+    _remember(key, response)
     return response.json()
 
 
@@ -41,6 +164,7 @@ def get_ideas(
     level: str | None = None,
     count: int = 3,
     enable_multi_query: bool = False,
+    fresh: bool = False,
 ) -> dict:
     """Call POST /ideas and return {ideas: [...], run_id: str}."""
     payload: dict = {
@@ -48,6 +172,8 @@ def get_ideas(
         "count": count,
         "enable_multi_query": enable_multi_query,
     }
+    if fresh:
+        payload["fresh"] = True
     if domain and domain.strip():
         payload["domain"] = domain.strip()
     if level and level.strip():
@@ -55,15 +181,81 @@ def get_ideas(
     return _post("/ideas", payload, timeout=120)
 
 
-def expand_idea(run_id: str, pid: int) -> dict:
-    """Call POST /expand and return the expanded idea dict."""
-    return _post("/expand", {"run_id": run_id, "pid": pid}, timeout=90)
+def start_ideas_job(
+    tech_stack: str,
+    *,
+    domain: str | None = None,
+    level: str | None = None,
+    count: int = 3,
+    enable_multi_query: bool = False,
+    fresh: bool = False,
+) -> str:
+    """Call POST /jobs/ideas and return the job_id."""
+    payload: dict = {
+        "tech_stack": tech_stack,
+        "count": count,
+        "enable_multi_query": enable_multi_query,
+    }
+    if fresh:
+        payload["fresh"] = True
+    if domain and domain.strip():
+        payload["domain"] = domain.strip()
+    if level and level.strip():
+        payload["level"] = level.strip()
+    return _post("/jobs/ideas", payload, timeout=30)["job_id"]
+
+
+def get_job(job_id: str) -> dict:
+    """Call GET /jobs/{job_id} and return {status, progress, run_id, result, error}."""
+    response = _client().get(f"/jobs/{job_id}", timeout=_timeout(30))
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_for_job(
+    job_id: str,
+    *,
+    poll_interval: float = 1.5,
+    timeout: float = 600,
+    on_progress=None,
+) -> dict:
+    """Poll a job until it finishes and return its result ({ideas, run_id}).
+
+    *on_progress* is called with the last graph node reached whenever it changes.
+    Raises RuntimeError if the job fails and TimeoutError if it takes too long.
+    """
+    deadline = time.monotonic() + timeout
+    last_node = None
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        node = (job.get("progress") or {}).get("node")
+        if on_progress and node != last_node:
+            on_progress(node)
+            last_node = node
+        if job["status"] == "succeeded":
+            return job.get("result") or {}
+        if job["status"] == "failed":
+            raise RuntimeError(job.get("error") or "Job failed")
+        time.sleep(poll_interval)
+    raise TimeoutError(f"Job {job_id} did not finish within {timeout:.0f}s")
+
+
+def expand_idea(run_id: str, pid: int, *, fresh: bool = False) -> dict:
+    """Call POST /expand and return the expanded idea dict.
+
+    fresh=True regenerates the expansion instead of serving a stored one.
+    """
+    payload: dict = {"run_id": run_id, "pid": pid}
+    if fresh:
+        payload["fresh"] = True
+    return _post("/expand", payload, timeout=90)
 
 
 def export_idea(run_id: str, pid: int) -> str:
     """Call POST /export and return the raw Markdown string."""
-    url = f"{API_BASE_URL}/export"
-    response = httpx.post(url, json={"run_id": run_id, "pid": pid}, timeout=30)
+    response = _client().post(
+        "/export", json={"run_id": run_id, "pid": pid}, timeout=_timeout(30),
+    )
     response.raise_for_status()
     return response.text
 
@@ -73,7 +265,82 @@ def get_history(*, limit: int = 20, offset: int = 0) -> dict:
     return _get("/history", params={"limit": limit, "offset": offset})
 
 
-def get_run_detail(run_id: str) -> dict:
-    """Call GET /runs/{run_id} and return the full run including ideas."""
-    return _get(f"/runs/{run_id}")
+def _run_detail_params(fields: list[str] | None) -> dict | None:
+    return {"fields": ",".join(fields)} if fields else None
+
+
+def get_run_detail(run_id: str, *, fields: list[str] | None = None) -> dict:
+    """Call GET /runs/{run_id} and return the run including ideas.
+
+    Pass *fields* to fetch only those top-level keys (e.g. skip web_context).
+    """
+    return _get(f"/runs/{run_id}", params=_run_detail_params(fields))
+
+
+# ── async API ──────────────────────────────────────────────────────────────────
+
+
+async def aget_run_detail(
+    client: httpx.AsyncClient,
+    run_id: str,
+    *,
+    fields: list[str] | None = None,
+) -> dict:
+    """Async GET /runs/{run_id} on an existing AsyncClient."""
+    return await _aget(client, f"/runs/{run_id}", params=_run_detail_params(fields))
+
+
+async def aexport_idea(client: httpx.AsyncClient, run_id: str, pid: int) -> str:
+    """Async POST /export on an existing AsyncClient."""
+    response = await client.post(
+        "/export", json={"run_id": run_id, "pid": pid}, timeout=_timeout(30),
+    )
+    response.raise_for_status()
+    return response.text
+
+
+async def _gather_limited(coros: list, concurrency: int) -> list:
+    """Await *coros* with at most *concurrency* in flight; exceptions are returned, not raised."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(_run(c) for c in coros), return_exceptions=True)
+
+
+def get_run_details(
+    run_ids: list[str],
+    *,
+    fields: list[str] | None = None,
+    concurrency: int = API_ASYNC_CONCURRENCY,
+) -> dict[str, dict | Exception]:
+    """Fetch several runs in parallel. Returns {run_id: detail or the exception raised}."""
+
+    async def _main():
+        async with async_client() as client:
+            return await _gather_limited(
+                [aget_run_detail(client, rid, fields=fields) for rid in run_ids],
+                concurrency,
+            )
+
+    return dict(zip(run_ids, asyncio.run(_main())))
+
+
+def export_ideas(
+    run_id: str,
+    pids: list[int],
+    *,
+    concurrency: int = API_ASYNC_CONCURRENCY,
+) -> dict[int, str | Exception]:
+    """Export several ideas of one run in parallel. Returns {pid: markdown or the exception raised}."""
+
+    async def _main():
+        async with async_client() as client:
+            return await _gather_limited(
+                [aexport_idea(client, run_id, pid) for pid in pids],
+                concurrency,
+            )
 
+    return dict(zip(pids, asyncio.run(_main())))
@@ -4,10 +4,25 @@ Extracted from ui.py so that both the Home page and History page
 can render idea cards with the same layout.
 """
 
+import os
+
 import streamlit as st
 
 import ui.api_client as api
 
+# How long an exported Markdown file stays cached per (run_id, pid, version).
+EXPORT_CACHE_TTL_S = int(os.getenv("UI_EXPORT_CACHE_TTL_S", "600"))
+
+
+@st.cache_data(ttl=EXPORT_CACHE_TTL_S, show_spinner=False, max_entries=256)
+def _export_markdown(run_id: str, pid: int, version: int) -> str:
+    """Fetch the Markdown export once per expansion version.
+
+    *version* is not sent to the API; it only keys the cache so that a fresh
+    expansion of the same idea produces a fresh export.
+    """
+    return api.export_idea(run_id, pid)
+
 
 def idea_dict(idea) -> dict:
     """Normalize an idea to a plain dict regardless of source type."""
@@ -64,16 +79,23 @@ def render_idea_card(
             return
 
         # ── Expand ────────────────────────────────────────────────────
+        # The expansion result lives in session state, so reruns re-render it
+        # without calling the API; the version bumps on every fresh expansion.
         expand_key = f"expanded_{run_id}_{index}"
-        if st.button("Expand idea", key=f"expand_{run_id}_{index}"):
+        version_key = f"expanded_version_{run_id}_{index}"
+        # Once expanded, the button regenerates (fresh) instead of reusing the stored plan.
+        regenerate = expand_key in st.session_state
+        label = "Regenerate expansion" if regenerate else "Expand idea"
+        if st.button(label, key=f"expand_{run_id}_{index}"):
             with st.spinner("Generating deeper plan…"):
                 try:
-                    expanded = api.expand_idea(run_id, pid)
+                    expanded = api.expand_idea(run_id, pid, fresh=regenerate)
                 except Exception as exc:
                     st.error(f"Expand failed: {exc}")
                     expanded = None
             if expanded:
                 st.session_state[expand_key] = expanded
+                st.session_state[version_key] = st.session_state.get(version_key, 0) + 1
                 st.rerun()
 
         expanded_data = st.session_state.get(expand_key)
@@ -87,18 +109,24 @@ def render_idea_card(
                 st.warning("Could not generate extended plan.")
 
             # ── Export ────────────────────────────────────────────────
-            try:
-                md = api.export_idea(run_id, pid)
-            except Exception:
-                from app.services.export_formatter import idea_to_markdown
-                tech = st.session_state.get("export_tech_stack", "")
-                md = idea_to_markdown(d, ext, tech or None)
+            # Built lazily: the callable only runs when the user clicks
+            # Download, and its result is cached per expansion version.
+            version = st.session_state.get(version_key, 0)
+            tech = st.session_state.get("export_tech_stack", "")
+
+            def _build_markdown() -> str:
+                try:
+                    return _export_markdown(run_id, pid, version)
+                except Exception:
+                    from app.services.export_formatter import idea_to_markdown
+                    return idea_to_markdown(d, ext, tech or None)
 
             fname = (name.replace(" ", "_")[:50] or "idea") + ".md"
             st.download_button(
                 "Download as Markdown",
-                data=md,
+                data=_build_markdown,
                 file_name=fname,
                 mime="text/markdown",
                 key=f"download_{run_id}_{index}",
+                on_click="ignore",
             )
@@ -0,0 +1,89 @@
+"""Client-side TTL cache of run details for the History page.
+
+Users browse many past runs in one sitting, and Streamlit reruns the page
+on every click. This cache keeps fetched run details for a short TTL and can
+prefetch the runs currently listed in a background thread, so clicking
+"View" renders from memory instead of waiting on GET /runs/{run_id}.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ui.api_client as api
+
+# ── tuneable constants ────────────────────────────────────────────────────────
+DETAIL_TTL_S = float(os.getenv("UI_RUN_DETAIL_TTL_S", "300"))
+PREFETCH_CONCURRENCY = int(os.getenv("UI_PREFETCH_CONCURRENCY", "3"))
+MAX_ENTRIES = 500
+
+
+class RunDetailCache:
+    """Thread-safe run_id -> detail cache with TTL and background prefetch."""
+
+    def __init__(
+        self,
+        *,
+        fields: list[str] | None = None,
+        ttl_s: float = DETAIL_TTL_S,
+        concurrency: int = PREFETCH_CONCURRENCY,
+    ):
+        self._fields = fields
+        self._ttl_s = ttl_s
+        self._concurrency = concurrency
+        self._data: dict[str, tuple[float, dict]] = {}
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        # One background thread; the per-batch concurrency cap lives in
+        # api.get_run_details, so prefetch never floods the API.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-prefetch")
+
+    def get(self, run_id: str) -> dict | None:
+        """Return a fresh cached detail, or None."""
+        with self._lock:
+            entry = self._data.get(run_id)
+        if entry is None or time.monotonic() - entry[0] > self._ttl_s:
+            return None
+        return entry[1]
+
+    def fetch(self, run_id: str) -> dict:
+        """Return the cached detail, fetching it synchronously on a miss."""
+        if (detail := self.get(run_id)) is not None:
+            return detail
+        detail = api.get_run_detail(run_id, fields=self._fields)
+        self._store({run_id: detail})
+        return detail
+
+    def prefetch(self, run_ids: list[str]) -> None:
+        """Fetch any missing or stale run_ids in the background."""
+        with self._lock:
+            missing = [
+                rid for rid in run_ids
+                if rid not in self._in_flight
+                and (rid not in self._data or time.monotonic() - self._data[rid][0] > self._ttl_s)
+            ]
+            self._in_flight.update(missing)
+        if missing:
+            self._executor.submit(self._prefetch, missing)
+
+    def _prefetch(self, run_ids: list[str]) -> None:
+        try:
+            results = api.get_run_details(
+                run_ids, fields=self._fields, concurrency=self._concurrency,
+            )
+            # Failed fetches are simply left out; "View" falls back to fetch().
+            self._store({rid: d for rid, d in results.items() if isinstance(d, dict)})
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(run_ids)
+
+    def _store(self, details: dict[str, dict]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for rid, detail in details.items():
+                self._data[rid] = (now, detail)
+            if len(self._data) > MAX_ENTRIES:
+                oldest = sorted(self._data, key=lambda k: self._data[k][0])
+                for rid in oldest[: len(self._data) - MAX_ENTRIES]:
+                    del self._data[rid]
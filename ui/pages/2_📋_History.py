@@ -15,6 +15,7 @@ import streamlit as st
 
 import ui.api_client as api
 from ui.components import render_idea_card
+from ui.detail_cache import RunDetailCache
 
 st.set_page_config(page_title="Dev-Strom — History", page_icon="📋")
 st.title("📋 History")
@@ -23,6 +24,14 @@ st.caption("Browse your past idea-generation runs")
 # ── Pagination state ──────────────────────────────────────────────────────────
 
 PAGE_SIZE = 10
+# The detail view never shows web_context, so don't ship it over the wire.
+DETAIL_FIELDS = ["tech_stack", "ideas"]
+
+
+@st.cache_resource
+def _detail_cache() -> RunDetailCache:
+    """One detail cache per server process, shared across reruns."""
+    return RunDetailCache(fields=DETAIL_FIELDS)
 
 if "history_offset" not in st.session_state:
     st.session_state["history_offset"] = 0
@@ -39,10 +48,12 @@ def _load_runs(offset: int = 0, append: bool = False) -> None:
     try:
         result = api.get_history(limit=PAGE_SIZE, offset=offset)
         new_runs = result.get("runs", [])
+        # Copy rather than extend in place: never mutate a list another
+        # session may have been handed.
         if append:
-            st.session_state["history_runs"].extend(new_runs)
+            st.session_state["history_runs"] = [*st.session_state["history_runs"], *new_runs]
         else:
-            st.session_state["history_runs"] = new_runs
+            st.session_state["history_runs"] = list(new_runs)
         st.session_state["history_offset"] = offset
     except Exception as exc:
         st.error(f"Failed to load history: {exc}")
@@ -61,7 +72,7 @@ selected_id = st.session_state.get("selected_run_id")
 if selected_id:
     # ── Run detail ────────────────────────────────────────────────────────
     try:
-        run_detail = api.get_run_detail(selected_id)
+        run_detail = _detail_cache().fetch(selected_id)
     except Exception as exc:
         st.error(f"Failed to load run: {exc}")
         st.stop()
@@ -114,6 +125,9 @@ else:
                 st.session_state["selected_run_id"] = run_id
                 st.rerun()
 
+    # Warm the detail cache for every listed run so "View" renders instantly.
+    _detail_cache().prefetch([run["run_id"] for run in runs])
+
     st.divider()
 
     # ── Load more ─────────────────────────────────────────────────────